@@ -1,14 +1,19 @@
+import asyncio
 from datetime import date
 import logging
 import os
 from dotenv import load_dotenv
-from typing import List
+from typing import List, Optional
 from fastapi import HTTPException
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from prompt import stock_time_extraction_prompt, stock_report_prompt, summarization_prediction_prompt, article_extraction_prompt, price_extraction_prompt, suggested_analysis_prompt, agent_orchestrator_prompt
-from data_models import BronnResponse, PriceFinder, StockPredictionReport, StockTimeFinder, SuggestionReport, Summarization, NewsResponse
-from services.stock_prediction import make_prediction
+from prompt import SUMMARY_CACHE_VERSION
+from data_models import BronnResponse, PriceFinder, StockComparisonFinder, StockPredictionReport, StockTimeFinder, SuggestionReport, Summarization, NewsResponse
+from chains import chain_registry
+from services.entity_extractor import extract_amount, extract_stock_time, extract_stocks_time
+from services.compaction import token_batches
+from services.content_cache import SUMMARY_TTL, content_cache
+from services.indicators import indicator_engine
+from services.portfolio import Allocation
+from services.stock_prediction import make_prediction_async, make_predictions_async
 
 load_dotenv()
 
@@ -22,6 +27,9 @@ VALID_TICKERS = [
     "LT.NS", "SUNPHARMA.NS", "BHARTIARTL.NS", "HINDUNILVR.NS", "DMART.NS"
 ]
 
+SUMMARY_BATCH_TOKENS = int(os.getenv("BRONN_SUMMARY_BATCH_TOKENS", "9000"))
+SUMMARY_BATCH_SIZE = int(os.getenv("BRONN_SUMMARY_BATCH_SIZE", "5"))
+
 groq_api_key = os.getenv("GROQ_API_KEY")
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not groq_api_key:
@@ -29,103 +37,213 @@ if not groq_api_key:
 if not openai_api_key:
     raise EnvironmentError("OPENAI_API_KEY environment variable is not set")
 
-async def predict_stock(query: str):
-    stock_time_llm = ChatGroq(api_key=groq_api_key, model="mixtral-8x7b-32768")
-    stock_time_structured_llm = stock_time_llm.with_structured_output(StockTimeFinder)
-
+async def find_stock_time(query: str) -> StockTimeFinder:
     current_date = date.today()
 
-    extraction_chain = stock_time_extraction_prompt | stock_time_structured_llm
-   
-    result = await extraction_chain.ainvoke({"query": query, "current_date": current_date})
+    # Unambiguous queries are resolved locally; the LLM only sees the rest.
+    entities = extract_stock_time(query, current_date)
+    if entities:
+        return StockTimeFinder(ticker=entities[0], prediction_date=entities[1])
+    extraction_chain = chain_registry.get("stock_time")
+    return await extraction_chain.ainvoke({"query": query, "current_date": current_date})
+
+async def predict_stock(query: str, stock_time: Optional[StockTimeFinder] = None):
+    result = stock_time or await find_stock_time(query)
     
     if result.ticker and result.prediction_date:
         if result.ticker in VALID_TICKERS:
-            full_prediction, reduced_prediction = make_prediction(result.ticker, result.prediction_date)
+            full_prediction, reduced_prediction = await make_prediction_async(result.ticker, result.prediction_date)
             return full_prediction, reduced_prediction, result.ticker
         else:
             raise HTTPException(status_code=400, detail=f"We only provide predictions for the following stocks: {', '.join(VALID_TICKERS)}. The requested stock {result.ticker} is not in this list.")
     else:
         raise HTTPException(status_code=400, detail="Could not extract ticker or prediction date from the query.")
 
-async def generate_stock_report(prediction_data: dict, stock_name: str) -> StockPredictionReport:
+async def compare_stocks(query: str):
+    current_date = date.today()
+
+    entities = extract_stocks_time(query, current_date)
+    if entities:
+        result = StockComparisonFinder(tickers=entities[0], prediction_date=entities[1])
+    else:
+        extraction_chain = chain_registry.get("stock_comparison")
+        result = await extraction_chain.ainvoke({"query": query, "current_date": current_date})
 
-    stockreport = ChatGroq(api_key=groq_api_key, model="mixtral-8x7b-32768")
-    structured_stockreport_llm = stockreport.with_structured_output(StockPredictionReport)
+    tickers = list(dict.fromkeys(result.tickers or []))
+    if len(tickers) < 2 or not result.prediction_date:
+        raise HTTPException(status_code=400, detail="Could not extract at least two tickers and a prediction date from the query.")
+    invalid = [ticker for ticker in tickers if ticker not in VALID_TICKERS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"We only provide predictions for the following stocks: {', '.join(VALID_TICKERS)}. The requested stocks {', '.join(invalid)} are not in this list.")
 
-    extraction_chain = stock_report_prompt | structured_stockreport_llm 
+    predictions = await make_predictions_async([(ticker, result.prediction_date) for ticker in tickers])
+    full_predictions = {ticker: full for ticker, (full, _) in zip(tickers, predictions)}
+    reduced_predictions = {ticker: reduced for ticker, (_, reduced) in zip(tickers, predictions)}
+    return full_predictions, reduced_predictions, tickers
+
+async def generate_stock_report(prediction_data: dict, stock_name: str) -> StockPredictionReport:
+    extraction_chain = chain_registry.get("stock_report")
     try:
-        result = await extraction_chain.ainvoke({"prediction_data": prediction_data, "stock_name": stock_name})
+        technical_indicators = await asyncio.to_thread(indicator_engine.describe, stock_name)
+        result = await extraction_chain.ainvoke({
+            "prediction_data": prediction_data,
+            "stock_name": stock_name,
+            "technical_indicators": technical_indicators,
+        })
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating stock report: {str(e)}")
     
-async def extract_article_info(html_content: str, stock_name: str) -> NewsResponse:
-    article_extraction_llm = ChatGroq(api_key=groq_api_key, model="llama3-70b-8192")
-    structured_articles_llm = article_extraction_llm.with_structured_output(NewsResponse)
+async def generate_comparison_report(prediction_data: dict, stock_names: List[str]) -> StockPredictionReport:
+    report_chain = chain_registry.get("comparison_report")
+    try:
+        result = await report_chain.ainvoke({"prediction_data": prediction_data, "stock_names": ", ".join(stock_names)})
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating comparison report: {str(e)}")
 
-    extraction_chain = article_extraction_prompt | structured_articles_llm 
+async def extract_article_info(html_content: str, stock_name: str) -> NewsResponse:
+    extraction_chain = chain_registry.get("article_extraction")
     try:
         result = await extraction_chain.ainvoke({"html_content": html_content, "stock_name": stock_name})
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in extract_article_info: {str(e)}")
         raise HTTPException(status_code=500, detail="Error extracting article information")
 
-async def summarize_and_predict(article_content: str, stock_name: str) -> Summarization:
-    summarize_and_predict_llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4o")
-    structured_summarize_and_predict_llm = summarize_and_predict_llm.with_structured_output(Summarization)
+async def summarize_and_predict(article_content: str, stock_name: str, use_cache: bool = True) -> Summarization:
+    cache_key = content_cache.summary_key(article_content, stock_name, SUMMARY_CACHE_VERSION)
+    if use_cache:
+        cached = await content_cache.aget(cache_key)
+        if cached is not None:
+            return Summarization(**cached)
 
-    summarization_chain = summarization_prediction_prompt | structured_summarize_and_predict_llm 
+    summarization_chain = chain_registry.get("summarization")
     try:
         result = await summarization_chain.ainvoke({
             "article_content": article_content, 
             "stock_name": stock_name, 
         })
+        if use_cache:
+            await content_cache.aset(cache_key, result.dict(), SUMMARY_TTL)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in summarize_and_predict: {str(e)}")
         raise HTTPException(status_code=500, detail="Error summarizing and predicting")
     
 
+async def _summarize_one(article_content: str, stock_name: str) -> Optional[Summarization]:
+    try:
+        return await summarize_and_predict(article_content, stock_name)
+    except HTTPException:
+        return None
+
+async def _summarize_chunk(article_contents: List[str], stock_name: str) -> List[Optional[Summarization]]:
+    if len(article_contents) == 1:
+        return [await _summarize_one(article_contents[0], stock_name)]
+
+    batch_chain = chain_registry.get("batch_summarization")
+    results: List[Optional[Summarization]] = [None] * len(article_contents)
+    try:
+        response = await batch_chain.ainvoke({
+            "stock_name": stock_name,
+            "article_count": len(article_contents),
+            "articles": "\n\n".join(f"Article {i}:\n```{content}```" for i, content in enumerate(article_contents, start=1)),
+        })
+        for entry in response.summaries:
+            position = entry.article_id - 1
+            if 0 <= position < len(results) and results[position] is None:
+                results[position] = Summarization(summary=entry.summary, prediction=entry.prediction)
+    except HTTPException as e:
+        # Providers are throttling or down: splitting the batch into single calls would only add load.
+        logger.error(f"Batch summarization of {len(article_contents)} articles failed: {e.detail}")
+        return results
+    except Exception as e:
+        logger.error(f"Error in batch summarization of {len(article_contents)} articles: {str(e)}")
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        # Schema failures and skipped articles get their own request.
+        logger.info(f"Batch summarization fell back to single calls for {len(missing)} of {len(article_contents)} articles")
+        singles = await asyncio.gather(*[_summarize_one(article_contents[i], stock_name) for i in missing])
+        for i, result in zip(missing, singles):
+            results[i] = result
+    return results
+
+async def summarize_batch(article_contents: List[str], stock_name: str, use_cache: bool = True) -> List[Optional[Summarization]]:
+    """Summarize several articles in as few requests as the token budget allows; None where an article failed."""
+    keys = [content_cache.summary_key(content, stock_name, SUMMARY_CACHE_VERSION) for content in article_contents]
+    results: List[Optional[Summarization]] = [None] * len(article_contents)
+    if use_cache:
+        for i, cached in enumerate(await asyncio.gather(*[content_cache.aget(key) for key in keys])):
+            if cached is not None:
+                results[i] = Summarization(**cached)
+
+    uncached = [i for i, result in enumerate(results) if result is None]
+    model = chain_registry.specs["batch_summarization"].model
+    chunks = [[uncached[j] for j in chunk] for chunk in token_batches([article_contents[i] for i in uncached], SUMMARY_BATCH_TOKENS, SUMMARY_BATCH_SIZE, model)]
+    summaries = await asyncio.gather(*[_summarize_chunk([article_contents[i] for i in chunk], stock_name) for chunk in chunks])
+    for chunk, chunk_summaries in zip(chunks, summaries):
+        for i, summary in zip(chunk, chunk_summaries):
+            results[i] = summary
+    if use_cache:
+        await asyncio.gather(*[
+            content_cache.aset(keys[i], results[i].dict(), SUMMARY_TTL) for i in uncached if results[i] is not None
+        ])
+    return results
+
 async def extract_price(query: str) -> PriceFinder:
-    price_extractor = ChatGroq(api_key=groq_api_key, model="gemma2-9b-it")
-    price_extractor_structured = price_extractor.with_structured_output(PriceFinder)
-    price_extraction_chain = price_extraction_prompt | price_extractor_structured
+    amount = extract_amount(query)
+    if amount is not None:
+        return PriceFinder(price=amount)
+
+    price_extraction_chain = chain_registry.get("price_extraction")
 
     try:
         result = await price_extraction_chain.ainvoke({"query": query})
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in extract_price: {str(e)}")
         raise HTTPException(status_code=500, detail="Error extracting price from query")
 
-async def generate_suggestion_report(suggested_stocks: List) -> SuggestionReport:
-    suggestion_report = ChatGroq(api_key=groq_api_key, model="gemma2-9b-it")
-    suggestion_report_structured = suggestion_report.with_structured_output(SuggestionReport)
-    suggestion_report_chain = suggested_analysis_prompt | suggestion_report_structured
+async def generate_suggestion_report(suggested_stocks: List, allocation: Optional[Allocation] = None) -> SuggestionReport:
+    suggestion_report_chain = chain_registry.get("suggestion_report")
 
     try:
-        result = await suggestion_report_chain.ainvoke({"suggested_stocks": suggested_stocks})
+        result = await suggestion_report_chain.ainvoke({
+            "suggested_stocks": suggested_stocks,
+            "allocation": allocation.describe() if allocation else "No allocation was computed for this query.",
+        })
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in generate_suggestion_report: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating suggestion report")
     
 async def bronn_orchestrator(query: str) -> BronnResponse:
-    bronn_orchestrator = ChatOpenAI(api_key=openai_api_key, model="gpt-4o")
-    bronn_orchestrator_structured = bronn_orchestrator.with_structured_output(BronnResponse)
-
-    bronn_orchestrator_chain = agent_orchestrator_prompt | bronn_orchestrator_structured
+    bronn_orchestrator_chain = chain_registry.get("orchestrator")
 
     try:
         result = await bronn_orchestrator_chain.ainvoke({"query": query})
 
-        if result.response in ['0', '1', '2']:
+        if result.response in ['0', '1', '2', '3']:
             return BronnResponse(response=result.response)
         else:
             return BronnResponse(response=result.response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in generate_suggestion_report: {str(e)}")
         return BronnResponse(response="I'm sorry, I encountered an error while processing your request. Could you please try rephrasing your query?")
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import timeit
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.html_text import etree, extract_text
+
+WANTED_TAGS = ["h1", "h2", "h3", "span", "p", "a"]
+
+
+def clean_html_bs4(html_content: str, wanted_tags, unwanted_tags=("script", "style")) -> str:
+    # The previous WebScraper implementation, kept as the baseline.
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in unwanted_tags:
+        for element in soup.find_all(tag):
+            element.decompose()
+
+    text_parts = []
+    for tag in wanted_tags:
+        for element in soup.find_all(tag):
+            if tag == "a":
+                href = element.get("href")
+                text_parts.append(f"{element.get_text()} ({href})" if href else element.get_text())
+            else:
+                text_parts.append(element.get_text())
+
+    seen = set()
+    lines = [line.strip() for line in " ".join(text_parts).split("\n")]
+    return " ".join(line for line in lines if line and not (line in seen or seen.add(line)))
+
+
+def synthetic_page(paragraphs: int = 400) -> str:
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(
+            f"<div><h2>Heading {i}</h2><script>var x{i} = {i};</script>"
+            f"<p>Paragraph {i} with <span>inline {i}</span> and "
+            f"<a href='https://example.com/{i}'>a link {i}</a>.</p><style>.c{i}{{}}</style></div>"
+        )
+    return "<html><body><h1>Synthetic page</h1>" + "".join(blocks) + "</body></html>"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HTML text extraction backends.")
+    parser.add_argument("path", nargs="?", help="HTML file to clean (default: a synthetic news page)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf-8", errors="replace") as f:
+            html_content = f.read()
+    else:
+        html_content = synthetic_page()
+
+    candidates = {
+        "bs4 (previous)": lambda: clean_html_bs4(html_content, WANTED_TAGS),
+        "single-pass html.parser": lambda: extract_text(html_content, WANTED_TAGS, backend="html.parser"),
+    }
+    if etree is not None:
+        candidates["single-pass lxml"] = lambda: extract_text(html_content, WANTED_TAGS, backend="lxml")
+
+    print(f"{len(html_content)} bytes, best of {args.repeat} runs")
+    for name, run in candidates.items():
+        output = run()
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:28s} {best * 1000:8.2f} ms  {len(output):7d} chars")
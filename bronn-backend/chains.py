@@ -0,0 +1,176 @@
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from langchain.prompts import ChatPromptTemplate
+from prompt import stock_time_extraction_prompt, stock_comparison_extraction_prompt, stock_comparison_report_prompt, stock_report_prompt, summarization_prediction_prompt, batch_summarization_prompt, article_extraction_prompt, price_extraction_prompt, suggested_analysis_prompt, agent_orchestrator_prompt
+from data_models import BatchSummarization, BronnResponse, PriceFinder, StockComparisonFinder, StockPredictionReport, StockTimeFinder, SuggestionReport, Summarization, NewsResponse
+from services.llm_limiter import LLMBusyError, LLMLimiter, is_rate_limited, is_transient, llm_limiter
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONNECTIONS = int(os.getenv("BRONN_LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT = float(os.getenv("BRONN_LLM_TIMEOUT", "60"))
+# The limiter handles 429s itself; SDK retries would hide them and add load while a provider is throttling.
+LLM_SDK_RETRIES = int(os.getenv("BRONN_LLM_SDK_RETRIES", "0"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("BRONN_LLM_QUEUE_TIMEOUT", "15"))
+LLM_FAILOVER_AFTER = float(os.getenv("BRONN_LLM_FAILOVER_AFTER", "2"))
+
+MIXTRAL = ("groq", "mixtral-8x7b-32768")
+LLAMA = ("groq", "llama3-70b-8192")
+GEMMA = ("groq", "gemma2-9b-it")
+GPT4O = ("openai", "gpt-4o")
+GPT4O_MINI = ("openai", "gpt-4o-mini")
+
+
+class ChainSpec(NamedTuple):
+    provider: str
+    model: str
+    schema: Type
+    prompt: ChatPromptTemplate
+    fallbacks: Tuple[Tuple[str, str], ...] = ()
+
+
+CHAIN_SPECS: Dict[str, ChainSpec] = {
+    "stock_time": ChainSpec(*MIXTRAL, StockTimeFinder, stock_time_extraction_prompt, (LLAMA,)),
+    "stock_comparison": ChainSpec(*MIXTRAL, StockComparisonFinder, stock_comparison_extraction_prompt, (LLAMA,)),
+    "stock_report": ChainSpec(*MIXTRAL, StockPredictionReport, stock_report_prompt, (LLAMA,)),
+    "comparison_report": ChainSpec(*MIXTRAL, StockPredictionReport, stock_comparison_report_prompt, (LLAMA,)),
+    "article_extraction": ChainSpec(*LLAMA, NewsResponse, article_extraction_prompt, (MIXTRAL,)),
+    "summarization": ChainSpec(*GPT4O, Summarization, summarization_prediction_prompt, (GPT4O_MINI,)),
+    "batch_summarization": ChainSpec(*GPT4O, BatchSummarization, batch_summarization_prompt, (GPT4O_MINI,)),
+    "price_extraction": ChainSpec(*GEMMA, PriceFinder, price_extraction_prompt, (LLAMA,)),
+    "suggestion_report": ChainSpec(*GEMMA, SuggestionReport, suggested_analysis_prompt, (LLAMA,)),
+    "orchestrator": ChainSpec(*GPT4O, BronnResponse, agent_orchestrator_prompt, (GPT4O_MINI,)),
+}
+
+
+def failover_models(name: str, spec: ChainSpec) -> List[Tuple[str, str]]:
+    """Primary model first, then its fallbacks; BRONN_LLM_FAILOVER_<CHAIN>="groq:llama3-70b-8192,openai:gpt-4o-mini" overrides them ("" disables)."""
+    override = os.getenv(f"BRONN_LLM_FAILOVER_{name.upper()}")
+    if override is None:
+        fallbacks = list(spec.fallbacks)
+    else:
+        fallbacks = [tuple(item.strip().split(":", 1)) for item in override.split(",") if ":" in item]
+    models = [(spec.provider, spec.model)]
+    for model in fallbacks:
+        if model not in models:
+            models.append(model)
+    return models
+
+
+class FailoverChain:
+    """A chain per model, tried in order through the rate limiter.
+
+    A call moves on to the next model when the current one is throttled, down,
+    or has no free slot within LLM_FAILOVER_AFTER seconds; the last model may
+    queue until LLM_QUEUE_TIMEOUT. Wrong or unparseable output is not retried.
+    """
+
+    def __init__(self, name: str, chains: List[Tuple[str, str, Any]], limiter: LLMLimiter):
+        self.name = name
+        self.chains = chains
+        self.limiter = limiter
+
+    async def ainvoke(self, inputs: Any, *args, **kwargs) -> Any:
+        deadline = time.monotonic() + LLM_QUEUE_TIMEOUT
+        errors = []
+        for attempt, (provider, model, chain) in enumerate(self.chains):
+            if attempt:
+                self.limiter.failovers += 1
+                logger.warning(f"Chain {self.name} failing over to {provider}/{model} after: {errors[-1]!r}")
+            last = attempt == len(self.chains) - 1
+            queue_deadline = deadline if last else min(deadline, time.monotonic() + LLM_FAILOVER_AFTER)
+            try:
+                return await self.limiter.run(provider, model, lambda: chain.ainvoke(inputs, *args, **kwargs), queue_deadline)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                errors.append(e)
+
+        logger.error(f"Chain {self.name} failed on every model: {errors!r}")
+        if all(isinstance(e, LLMBusyError) or is_rate_limited(e) for e in errors):
+            raise HTTPException(status_code=429, detail="The language models are busy, please retry shortly.")
+        raise HTTPException(status_code=503, detail="The language models are unavailable, please retry shortly.")
+
+
+class ChainRegistry:
+    """Builds each prompt | structured-LLM pipeline once per process.
+
+    Clients of the same provider share one keep-alive httpx client, and every
+    call goes through the shared rate limiter with failover between models.
+    Tests can swap in a fake with `set_llm_factory` (or point OPENAI_BASE_URL /
+    GROQ_API_BASE at a local fake server) or replace a whole chain with `override`.
+    """
+
+    def __init__(self, specs: Dict[str, ChainSpec] = CHAIN_SPECS, limiter: LLMLimiter = llm_limiter):
+        self.specs = specs
+        self.limiter = limiter
+        self._chains: Dict[str, Any] = {}
+        self._llms: Dict[tuple, Any] = {}
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._llm_factory: Callable[[str, str], Any] = self._default_llm_factory
+
+    def http_client(self, provider: str) -> httpx.AsyncClient:
+        client = self._http_clients.get(provider)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=LLM_TIMEOUT,
+                limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+            )
+            self._http_clients[provider] = client
+        return client
+
+    def _default_llm_factory(self, provider: str, model: str) -> Any:
+        if provider == "groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model=model, max_retries=LLM_SDK_RETRIES, http_async_client=self.http_client(provider))
+        if provider == "openai":
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(api_key=os.getenv("OPENAI_API_KEY"), model=model, max_retries=LLM_SDK_RETRIES, http_async_client=self.http_client(provider))
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def llm(self, provider: str, model: str) -> Any:
+        key = (provider, model)
+        if key not in self._llms:
+            self._llms[key] = self._llm_factory(provider, model)
+        return self._llms[key]
+
+    def get(self, name: str) -> Any:
+        chain = self._chains.get(name)
+        if chain is None:
+            spec = self.specs[name]
+            models = failover_models(name, spec)
+            chain = FailoverChain(name, [
+                (provider, model, spec.prompt | self.llm(provider, model).with_structured_output(spec.schema))
+                for provider, model in models
+            ], self.limiter)
+            self._chains[name] = chain
+            logger.info(f"Built chain {name} ({', '.join(f'{provider}/{model}' for provider, model in models)})")
+        return chain
+
+    def override(self, name: str, chain: Any) -> None:
+        self._chains[name] = chain
+
+    def set_llm_factory(self, factory: Optional[Callable[[str, str], Any]]) -> None:
+        self._llm_factory = factory or self._default_llm_factory
+        self.reset()
+
+    def reset(self) -> None:
+        self._chains.clear()
+        self._llms.clear()
+
+    async def aclose(self) -> None:
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+        self.reset()
+
+
+chain_registry = ChainRegistry()
@@ -14,6 +14,12 @@ class Summarization(BaseModel):
             }
         }
 
+class ArticleSummarization(Summarization):
+    article_id: int = Field(..., description="Number of the article this entry summarizes, as given in its header")
+
+class BatchSummarization(BaseModel):
+    summaries: List[ArticleSummarization] = Field([], description="Exactly one entry per input article")
+
 
 class Article(BaseModel):
     title: str = Field('', description="Title of the article")
@@ -79,6 +85,18 @@ class StockTimeFinder(BaseModel):
             }
         }
 
+class StockComparisonFinder(BaseModel):
+    tickers: List[str] = Field([], description="Stock ticker symbols to compare, e.g., ['TCS.NS', 'INFY.NS']")
+    prediction_date: date = Field(" ", description="Date for the stock predictions in YYYY-MM-DD format")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "tickers": ["TCS.NS", "INFY.NS", "HCLTECH.NS"],
+                "prediction_date": "2024-09-21"
+            }
+        }
+
 class PriceFinder(BaseModel):
     price: Optional[int] = Field(0, description="Price of the stock in integer format, e.g., 50")
 
@@ -1,11 +1,17 @@
 
+import asyncio
 import logging
-from typing import Literal, Optional
+import os
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
 from pydantic import BaseModel, Field, HttpUrl
 import requests
-from agents import summarize_and_predict
+from agents import SUMMARY_BATCH_SIZE, SUMMARY_BATCH_TOKENS, summarize_and_predict, summarize_batch
+from chains import chain_registry
 from data_models import  NewsResponse
+from services.compaction import ContentCompactor, count_tokens
+from services.content_cache import PAGE_TEXT_TTL
 from services.webscraper import WebScraper
+from services.http_client import fetcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,41 +25,201 @@ class Article(BaseModel):
     summary: str = Field('', description="Summary of the article")
     prediction: Literal["UP", "DOWN"] = Field(None, description="Prediction indicating either 'UP' or 'DOWN'")
 
-async def process_articles(news_response: NewsResponse, stock_name: str) -> NewsResponse:
-    processed_articles = []
-    for article in news_response.news.articles:
-        try:
-            scraper = WebScraper(article.link)
-            article_data = scraper.scraping_with_langchain(wanted_tags=["h1", "h2", "h3", "span", "p"])
-            sum_data = await summarize_and_predict(article_data, stock_name)
-            print(sum_data)
-            processed_article = Article(
-                title=article.title,
-                source=article.source,
-                time_uploaded=article.time_uploaded,
-                link=article.link,
-                summary=sum_data.summary,
-                prediction=sum_data.prediction
-            )
-            processed_articles.append(processed_article)
-        except Exception as e:
-            logger.error(f"Error processing article: {str(e)}")
-            processed_article = Article(
-                title=article.title,
-                source=article.source,
-                time_uploaded=article.time_uploaded,
-                link=article.link,
-                summary="",
-                prediction=""
-            )
-            processed_articles.append(processed_article)  # Add original article if processing fails
+ARTICLE_CONCURRENCY = int(os.getenv("BRONN_ARTICLE_CONCURRENCY", "5"))
+ARTICLE_TIMEOUT = float(os.getenv("BRONN_ARTICLE_TIMEOUT", "20"))
+ARTICLES_DEADLINE = float(os.getenv("BRONN_ARTICLES_DEADLINE", "45"))
+BATCH_SUMMARIES = os.getenv("BRONN_BATCH_SUMMARIES", "true").lower() == "true"
+SUMMARY_BATCH_LINGER = float(os.getenv("BRONN_SUMMARY_BATCH_LINGER", "1.5"))
+
+def fallback_article(article) -> Article:
+    return Article(
+        title=article.title,
+        source=article.source,
+        time_uploaded=article.time_uploaded,
+        link=article.link,
+        summary="",
+    )
+
+async def fetch_article_text(article, stock_name: str, compactor: ContentCompactor) -> str:
+    scraper = WebScraper(article.link)
+    article_data = await scraper.scraping_with_langchain(wanted_tags=["h1", "h2", "h3", "span", "p"], cache_ttl=PAGE_TEXT_TTL)
+    return await asyncio.to_thread(
+        compactor.compact, article_data, stock_name, chain_registry.specs["summarization"].model, label=str(article.link)
+    )
+
+def summarized_article(article, sum_data) -> Article:
+    return Article(
+        title=article.title,
+        source=article.source,
+        time_uploaded=article.time_uploaded,
+        link=article.link,
+        summary=sum_data.summary,
+        prediction=sum_data.prediction
+    )
+
+async def _summarize_article(article, stock_name: str, compactor: ContentCompactor) -> Article:
+    article_data = await fetch_article_text(article, stock_name, compactor)
+    sum_data = await summarize_and_predict(article_data, stock_name)
+    return summarized_article(article, sum_data)
+
+async def process_article(
+    article,
+    stock_name: str,
+    semaphore: asyncio.Semaphore,
+    compactor: Optional[ContentCompactor] = None,
+    timeout: Optional[float] = None,
+) -> Article:
+    async with semaphore:
+        # The timeout starts once a slot is free; time queued behind other articles doesn't count against it.
+        return await asyncio.wait_for(_summarize_article(article, stock_name, compactor or ContentCompactor()), timeout)
+
+async def _iter_single_articles(
+    articles: List,
+    stock_name: str,
+    concurrency: int,
+    article_timeout: float,
+    deadline: float,
+) -> AsyncIterator[Tuple[int, Article]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    compactor = ContentCompactor()
+    tasks = {
+        asyncio.create_task(process_article(article, stock_name, semaphore, compactor, article_timeout)): index
+        for index, article in enumerate(articles)
+    }
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks[task]
+                # Articles that failed or timed out keep their metadata with an empty summary.
+                if task.cancelled() or task.exception() is not None:
+                    error = "cancelled" if task.cancelled() else repr(task.exception())
+                    logger.error(f"Error processing article: {error}")
+                    yield index, fallback_article(articles[index])
+                else:
+                    yield index, task.result()
+        for task in pending:
+            task.cancel()
+            logger.error(f"Article missed the deadline: {articles[tasks[task]].link}")
+            yield tasks[task], fallback_article(articles[tasks[task]])
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _fetch_guarded(article, stock_name: str, semaphore: asyncio.Semaphore, compactor: ContentCompactor, timeout: float) -> str:
+    async with semaphore:
+        return await asyncio.wait_for(fetch_article_text(article, stock_name, compactor), timeout)
+
+async def _iter_batched_articles(
+    articles: List,
+    stock_name: str,
+    concurrency: int,
+    article_timeout: float,
+    deadline: float,
+) -> AsyncIterator[Tuple[int, Article]]:
+    """Fetch concurrently and summarize fetched articles together, flushing a batch once it fills the token budget."""
+    semaphore = asyncio.Semaphore(concurrency)
+    compactor = ContentCompactor()
+    model = chain_registry.specs["batch_summarization"].model
+    fetches = {
+        asyncio.create_task(_fetch_guarded(article, stock_name, semaphore, compactor, article_timeout)): index
+        for index, article in enumerate(articles)
+    }
+    batches: Dict[asyncio.Task, List[int]] = {}
+    buffer: List[Tuple[int, str]] = []
+    buffered_tokens = 0
+
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    flush_at = None
+
+    def flush() -> None:
+        nonlocal buffer, buffered_tokens, flush_at
+        batch = asyncio.create_task(summarize_batch([text for _, text in buffer], stock_name))
+        batches[batch] = [index for index, _ in buffer]
+        buffer, buffered_tokens, flush_at = [], 0, None
+
+    try:
+        while fetches or batches or buffer:
+            # A slow page shouldn't hold back articles that are ready; wait at most the linger time for company.
+            if buffer and (not fetches or loop.time() >= flush_at):
+                flush()
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, flush_at - loop.time()) if buffer else remaining
+            done, _ = await asyncio.wait(set(fetches) | set(batches), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                failed = task.cancelled() or task.exception() is not None
+                if task in fetches:
+                    index = fetches.pop(task)
+                    if failed:
+                        error = "cancelled" if task.cancelled() else repr(task.exception())
+                        logger.error(f"Error processing article: {error}")
+                        yield index, fallback_article(articles[index])
+                        continue
+                    text = task.result()
+                    tokens = count_tokens(text, model)
+                    if buffer and buffered_tokens + tokens > SUMMARY_BATCH_TOKENS:
+                        flush()
+                    if not buffer:
+                        flush_at = loop.time() + SUMMARY_BATCH_LINGER
+                    buffer.append((index, text))
+                    buffered_tokens += tokens
+                    # Several fetches can finish in one wakeup; don't let them overfill a batch.
+                    if len(buffer) >= SUMMARY_BATCH_SIZE:
+                        flush()
+                else:
+                    indices = batches.pop(task)
+                    summaries = [None] * len(indices) if failed else task.result()
+                    if failed:
+                        logger.error(f"Error summarizing article batch: {'cancelled' if task.cancelled() else repr(task.exception())}")
+                    for index, sum_data in zip(indices, summaries):
+                        yield index, summarized_article(articles[index], sum_data) if sum_data else fallback_article(articles[index])
+        for index in [*fetches.values(), *(i for indices in batches.values() for i in indices), *(i for i, _ in buffer)]:
+            logger.error(f"Article missed the deadline: {articles[index].link}")
+            yield index, fallback_article(articles[index])
+    finally:
+        for task in [*fetches, *batches]:
+            task.cancel()
+
+def iter_processed_articles(
+    articles: List,
+    stock_name: str,
+    concurrency: int = ARTICLE_CONCURRENCY,
+    article_timeout: float = ARTICLE_TIMEOUT,
+    deadline: float = ARTICLES_DEADLINE,
+    batch: bool = BATCH_SUMMARIES,
+) -> AsyncIterator[Tuple[int, Article]]:
+    if batch:
+        return _iter_batched_articles(articles, stock_name, concurrency, article_timeout, deadline)
+    return _iter_single_articles(articles, stock_name, concurrency, article_timeout, deadline)
+
+async def process_articles(news_response: NewsResponse, stock_name: str, **options) -> NewsResponse:
+    articles = news_response.news.articles
+    processed_articles = [None] * len(articles)
+    async for index, processed_article in iter_processed_articles(articles, stock_name, **options):
+        processed_articles[index] = processed_article
 
     news_response.news.articles = processed_articles
     return news_response
 
-def get_logo_url(ticker: str) -> Optional[str]:
+def logo_candidate_url(ticker: str) -> str:
     company_name = ticker.split('.')[0]
-    url = f"https://logo.clearbit.com/{company_name}.com"
+    return f"https://logo.clearbit.com/{company_name}.com"
+
+async def aget_logo_url(ticker: str) -> Optional[str]:
+    url = logo_candidate_url(ticker)
+    return url if await fetcher.probe(url) else None
+
+def get_logo_url(ticker: str) -> Optional[str]:
+    url = logo_candidate_url(ticker)
     try:
         response = requests.get(url)
         if response.status_code == 200:
@@ -22,6 +22,9 @@ Scraped text:
 ```{html_content}```
 """)
 
+# Bump when summarization_prediction_prompt changes so cached summaries are not reused.
+SUMMARIZATION_PROMPT_VERSION = "1"
+
 summarization_prediction_prompt = ChatPromptTemplate.from_template("""
 Analyze this article about {stock_name} stock. Provide a summary and prediction in this exact JSON format:
 {{
@@ -38,6 +41,30 @@ Article:
                                                                    
 """)
 
+# Several articles in one request; each entry must match summarization_prediction_prompt's output.
+# Bump when batch_summarization_prompt changes so cached summaries are not reused.
+BATCH_SUMMARIZATION_PROMPT_VERSION = "1"
+
+# Single and batch summaries share cache entries, so their key depends on both prompts.
+SUMMARY_CACHE_VERSION = f"{SUMMARIZATION_PROMPT_VERSION}.{BATCH_SUMMARIZATION_PROMPT_VERSION}"
+
+batch_summarization_prompt = ChatPromptTemplate.from_template("""
+Analyze each of the following {article_count} articles about {stock_name} stock independently. Return exactly one entry per article in this JSON format:
+{{
+  "summaries": [
+    {{"article_id": 1, "summary": "4-6 sentence summary", "prediction": "UP or DOWN"}}
+  ]
+}}
+Instructions:
+1. article_id: The number from the article's header. Every article must appear exactly once.
+
+2. Summary: Write a detailed summary of the article in 4-6 sentences. Focus on the most important points that could impact the stock price. Include key financial data, company developments, and market trends mentioned in the article. Use only that article's content; do not mix in facts from the other articles.
+
+3. Prediction: Based on the information in that article alone, predict whether the stock is likely to go UP or DOWN in the short term. Use only "UP" or "DOWN" for your prediction.
+
+{articles}
+""")
+
 stock_time_extraction_prompt = ChatPromptTemplate.from_template("""
 You are a financial assistant tasked with extracting stock ticker information and prediction timeframes from user queries. You have access to the following list of Indian stock tickers:
 
@@ -68,6 +95,35 @@ JSON Result:
 """)
 
 
+stock_comparison_extraction_prompt = ChatPromptTemplate.from_template("""
+You are a financial assistant tasked with extracting the stocks a user wants to compare and the prediction timeframe from their query. You have access to the following list of Indian stock tickers:
+
+HDFCBANK.NS (HDFC Bank)
+RELIANCE.NS (Reliance Industries)
+ICICIBANK.NS (ICICI Bank)
+INFY.NS (Infosys)
+TCS.NS (Tata Consultancy Services)
+LT.NS (Larsen & Toubro)
+SUNPHARMA.NS (Sun Pharmaceutical Industries)
+BHARTIARTL.NS (Bharti Airtel)
+HINDUNILVR.NS (Hindustan Unilever)
+DMART.NS (Avenue Supermarts / DMart)
+
+User Query: {query}
+
+Your tasks:
+1. Identify every company or stock mentioned in the query and map each one to its ticker from the list above.
+2. Identify any mention of a prediction timeframe (e.g., "next week", "over the next month", "by end of year").
+3. Convert the identified timeframe to a specific date in the format YYYY-MM-DD.
+   - Use the current date ({current_date}) as the reference point.
+   - If no specific timeframe is mentioned, use the current date plus 7 days as the default.
+
+Be sure to handle partial matches and common abbreviations for company names.
+
+JSON Result:
+""")
+
+
 stock_report_prompt = ChatPromptTemplate.from_template("""
 You are an AI assistant specializing in explaining financial predictions. Your task is to interpret and communicate the results of our stock prediction model for {stock_name}. Remember, these are predictions and not guaranteed outcomes.
 
@@ -75,6 +131,9 @@ Stock Name: ```{stock_name}```
 Our Model's Prediction Data:
 ```{prediction_data}```
 
+Technical Indicators from the actual price history, as of the last recorded trading day:
+```{technical_indicators}```
+
 Analyze this prediction data and provide a structured JSON response with the following components:
 
 1. "introduction": A concise summary of 3 to 5 sentences our model's predicted trend for {stock_name}. Include the overall change and percentage change predicted by the model, as well as the number of business days in the prediction period.
@@ -87,18 +146,43 @@ Analyze this prediction data and provide a structured JSON response with the fol
    - The trend over the last N days (where N is the shorter of 30 or the total prediction days)
    - Comparison of moving averages at the end of the prediction period (use the actual number of days as shown in the data)
    - Any notable patterns or turning points in our predicted data points
+   - Where the stock stands today according to the technical indicators: price versus its 50 and 200 day averages, RSI (overbought above 70, oversold below 30), the MACD histogram, position within the Bollinger bands, ATR as a measure of daily range, and drawdown from the peak
 
 3. "conclusion": A brief synthesis of the main points from our model's prediction, including potential scenarios for the stock. Consider the volatility and trend information when discussing potential outcomes. Emphasize the speculative nature of these predictions and advise users to consider other factors and do their own research before making investment decisions.
 
 Use clear, accessible language and always remind the user that these are model-based predictions, not guarantees. Interpret our model's predictions:
 """)
 
+stock_comparison_report_prompt = ChatPromptTemplate.from_template("""
+You are an AI assistant specializing in explaining financial predictions. Your task is to compare the results of our stock prediction model for several stocks: {stock_names}. Remember, these are predictions and not guaranteed outcomes.
+
+Our Model's Prediction Data, per stock:
+```{prediction_data}```
+
+Analyze this prediction data and provide a structured JSON response with the following components:
+
+1. "introduction": A concise summary of 3 to 5 sentences comparing the predicted trends of the stocks, including the overall change and percentage change predicted for each.
+
+2. "insights": A markdown-formatted string with one bullet per observation. Consider:
+   - Which stock is predicted to gain or lose the most, in absolute and percentage terms
+   - Volatility of each stock relative to the others
+   - All-time high and low predicted prices with their dates
+   - Trend direction and moving averages at the end of the prediction period
+
+3. "conclusion": A brief synthesis ranking the stocks by predicted performance and risk. Emphasize the speculative nature of these predictions and advise users to do their own research before making investment decisions.
+
+Use clear, accessible language and always remind the user that these are model-based predictions, not guarantees. Interpret our model's predictions:
+""")
+
 suggested_analysis_prompt = ChatPromptTemplate.from_template("""
 You are a sophisticated financial advisor tasked with providing insights on suggested stocks to a user. Based on the following stock suggestions, generate an introduction, detailed insights, and a conclusion.
 
 Suggested Stocks:
 {suggested_stocks}
 
+Proposed Allocation of the user's budget (whole shares, computed from recent price history under per-stock and per-sector limits):
+{allocation}
+
 Your tasks:
 1. Introduction:
    - Briefly summarize the overall market context.
@@ -116,7 +200,7 @@ Your tasks:
 3. Conclusion and Recommendations:
    - Summarize the key takeaways from the analysis.
    - Provide specific recommendations based on the data.
-   - Suggest a potential investment strategy or allocation.
+   - Explain the proposed allocation above, if there is one, using its exact share counts rather than inventing a different split.
    - Remind the user about the importance of diversification and conducting further research.
 
 
@@ -155,9 +239,12 @@ Functions:
 
 2 - Suggesting stocks (finding stocks based on price, sector, performance, criteria)
 
+3 - Comparing stocks (predicted performance of two or more specific stocks side by side)
+
 Instructions:
 - If the query is about predicting stock prices for a specific date or range, choose function 1.
-- If the query clearly matches one of these functions, output the corresponding function number (0, 1, or 2).
+- If the query asks to compare the future performance of two or more stocks, choose function 3.
+- If the query clearly matches one of these functions, output the corresponding function number (0, 1, 2, or 3).
 
 IMPORTANT: Greeting and Non-Matching Queries
 - If the query is a greeting (e.g., "hi", "hello", "good morning") or doesn't exactly match any of these functions, DO NOT output a function number.
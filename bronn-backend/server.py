@@ -1,13 +1,34 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import logging
 from dotenv import load_dotenv
-from agents import bronn_orchestrator, extract_article_info, extract_price, generate_stock_report, generate_suggestion_report, predict_stock
-from helper import process_articles
+import os
+from agents import VALID_TICKERS, bronn_orchestrator, compare_stocks, find_stock_time, generate_comparison_report, extract_article_info, extract_price, generate_stock_report, generate_suggestion_report, predict_stock
+from data_models import PriceFinder
+from helper import iter_processed_articles, process_articles
 from services.stock_suggestion import StockSuggester
 from services.webscraper import WebScraper
+from services.http_client import fetcher
+from chains import chain_registry
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, HttpUrl
+from typing import Optional
 from services.stock_prediction import make_prediction
+from services.prediction_pool import prediction_pool
+from services.forecast_cache import forecast_cache
+from services.content_cache import content_cache
+from services.intent_router import intent_router
+from services.entity_extractor import find_tickers, is_budget_query
+from services.coalescing import request_key, response_cache
+from services.llm_limiter import llm_limiter
+from services.compaction import ContentCompactor, compaction_stats
+from services.indicators import indicator_engine
+from services.html_text import extract_text
+from services.news_parser import build_news_response, news_parser_stats, parse_news_results
+from services.speculation import SPECULATIVE_EXECUTION, Speculation, speculation_metrics
 
 load_dotenv()
 
@@ -36,24 +57,103 @@ TICKERS = [
 ]
 suggester = StockSuggester(TICKERS)
 
+PREWARM_MODELS = os.getenv("BRONN_PREWARM_MODELS", "false").lower() == "true"
+SNAPSHOT_WAIT_SECONDS = float(os.getenv("BRONN_SNAPSHOT_WAIT_SECONDS", "10"))
 
+@app.on_event("startup")
+async def start_prediction_pool():
+    prediction_pool.start(VALID_TICKERS if PREWARM_MODELS else ())
+    suggester.snapshot.start()
+    # Kept so a failed first computation is logged instead of vanishing with an unobserved future.
+    app.state.indicator_refresh = asyncio.get_running_loop().run_in_executor(None, indicator_engine.refresh)
+    app.state.indicator_refresh.add_done_callback(log_indicator_refresh)
+
+def log_indicator_refresh(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error computing indicators: {str(future.exception())}")
+
+@app.on_event("shutdown")
+async def stop_prediction_pool():
+    prediction_pool.shutdown()
+    await suggester.snapshot.stop()
+    await fetcher.aclose()
+    await chain_registry.aclose()
+
+
+
+NEWS_PAGE_TAGS = ["h1", "h2", "h3", "span", "p", "a"]
+
+def news_search_url(query: str) -> str:
+    return f"https://www.google.com/search?q={query}+stock+news&tbm=nws"
+
+async def scrape_news_page(query: str) -> str:
+    return await WebScraper(news_search_url(query)).fetch_html()
+
+def compact_news_page(news_page: str, query: str) -> str:
+    page_text = extract_text(news_page, NEWS_PAGE_TAGS, separator="\n")
+    # Result cards are short fragments (title, source, time, link) in ranked order, so keep them all in order.
+    return ContentCompactor().compact(
+        page_text,
+        query,
+        chain_registry.specs["article_extraction"].model,
+        keep_links=True,
+        rank=False,
+        min_words=1,
+        label="news page",
+    )
+
+async def fetch_news(prompt: UserPrompt, news_page: Optional[str] = None):
+    if news_page is None:
+        news_page = await scrape_news_page(prompt.query)
 
-async def analyze_stock(prompt: UserPrompt):
     try:
-        scraper = WebScraper(f"https://www.google.com/search?q={prompt.query}+stock+news&tbm=nws")
-        scraper_articles = await scraper.scraping_with_langchain()
-        news_response = await extract_article_info(scraper_articles, prompt.query)
+        articles = await asyncio.to_thread(parse_news_results, news_page, prompt.query)
+    except Exception as e:
+        logger.error(f"Error parsing news results: {str(e)}")
+        articles = []
+    if articles:
+        news_parser_stats.counts["parsed"] += 1
+        return build_news_response(articles, prompt.query)
+
+    # Unrecognized layout or nothing clearly about the stock: let the LLM read the page text.
+    news_parser_stats.counts["llm_fallback"] += 1
+    scraper_articles = await asyncio.to_thread(compact_news_page, news_page, prompt.query)
+    return await extract_article_info(scraper_articles, prompt.query)
+
+def start_speculation(query: str) -> Speculation:
+    # Work the likely routes will need, started while the router is still deciding.
+    speculation = Speculation()
+    speculation.start("news_page", scrape_news_page(query))
+    tickers = find_tickers(query)
+    if tickers:
+        speculation.start("stock_time", find_stock_time(query))
+        if tickers[0] in VALID_TICKERS:
+            speculation.start("model_prewarm", prediction_pool.prewarm(tickers[0]))
+    else:
+        speculation.start("price", extract_price(query))
+    return speculation
+
+async def analyze_stock(prompt: UserPrompt, speculation: Optional[Speculation] = None):
+    try:
+        news_page = await speculation.take("news_page") if speculation else None
+        news_response = await fetch_news(prompt, news_page)
         
         processed_news_response = await process_articles(news_response, prompt.query)
         return processed_news_response
     
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Error in analyze_stock: {str(e)}")
         raise HTTPException(status_code=500, detail="Error analyzing stock")
 
-async def predict(user_query: UserPrompt):
+async def predict(user_query: UserPrompt, speculation: Optional[Speculation] = None):
     try:
-        full_prediction, reduced_prediction, stock_name = await predict_stock(user_query.query)
+        stock_time = None
+        if speculation:
+            speculation.keep("model_prewarm")
+            stock_time = await speculation.take("stock_time")
+        full_prediction, reduced_prediction, stock_name = await predict_stock(user_query.query, stock_time)
 
         report = await generate_stock_report(reduced_prediction, stock_name)
         
@@ -72,18 +172,48 @@ async def predict(user_query: UserPrompt):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
-async def analyze_stocks(user_query: UserPrompt):
+async def compare(user_query: UserPrompt):
     try:
-        price_finder = await extract_price(user_query.query)
-        user_price = price_finder.price
+        full_predictions, reduced_predictions, stock_names = await compare_stocks(user_query.query)
 
-        results = suggester.suggest_stocks(user_price, num_suggestions=3)
-        detailed_results = suggester.get_detailed_data(results)
+        report = await generate_comparison_report(reduced_predictions, stock_names)
 
-        suggestion_report = await generate_suggestion_report(detailed_results)
+        return {
+            "predictions": full_predictions,
+            "report": {
+                "introduction": report.introduction,
+                "insights": report.insights,
+                "conclusion": report.conclusion
+            }
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+async def find_suggestions(query: str, price_finder: Optional[PriceFinder] = None):
+    """Suggestions near the query's price, plus an allocation for budget queries; 503 until prices have loaded."""
+    price_finder = price_finder or await extract_price(query)
+    user_price = price_finder.price
+
+    if not await suggester.snapshot.wait_ready(timeout=SNAPSHOT_WAIT_SECONDS):
+        raise HTTPException(status_code=503, detail="Market prices are still loading, please retry shortly.")
+
+    results = suggester.suggest_stocks(user_price, num_suggestions=3)
+    allocation = suggester.allocate(user_price) if is_budget_query(query) else None
+    detailed_results = await suggester.get_detailed_data(results)
+    return detailed_results, allocation
+
+async def analyze_stocks(user_query: UserPrompt, speculation: Optional[Speculation] = None):
+    try:
+        price_finder = await speculation.take("price") if speculation else None
+        detailed_results, allocation = await find_suggestions(user_query.query, price_finder)
+
+        suggestion_report = await generate_suggestion_report(detailed_results, allocation)
 
         return {
             "suggested_stocks": detailed_results,
+            "allocation": allocation,
             "report": suggestion_report
         }
     except HTTPException as he:
@@ -93,24 +223,146 @@ async def analyze_stocks(user_query: UserPrompt):
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
     
 
-@app.post("/bronn")
-async def bronn_endpoint(user_prompt: UserPrompt):
+async def run_bronn(user_prompt: UserPrompt):
+    speculation = start_speculation(user_prompt.query) if SPECULATIVE_EXECUTION else None
     try:
-        bronn_response = await bronn_orchestrator(user_prompt.query)
-        
+        bronn_response = await intent_router.route(user_prompt.query, fallback=bronn_orchestrator)
+
         if bronn_response.response == "0":
-            return await analyze_stock(user_prompt)
+            return await analyze_stock(user_prompt, speculation)
         elif bronn_response.response == "1":
-            return await predict(user_prompt)
+            return await predict(user_prompt, speculation)
         elif bronn_response.response == "2":
-            return await analyze_stocks(user_prompt)
+            return await analyze_stocks(user_prompt, speculation)
+        elif bronn_response.response == "3":
+            return await compare(user_prompt)
         else:
             return {"general": bronn_response.response}
-    
+    finally:
+        if speculation:
+            speculation.discard()
+
+@app.post("/bronn")
+async def bronn_endpoint(user_prompt: UserPrompt):
+    try:
+        # Equivalent queries arriving together share one run, and its result for a short while after.
+        return await response_cache.aget_or_compute(request_key(user_prompt.query), lambda: run_bronn(user_prompt))
+    except HTTPException as he:
+        if he.status_code in (429, 503, 504):
+            raise he
+        logger.error(f"Error in bronn_endpoint: {he.detail}")
+        raise HTTPException(status_code=500, detail="Error processing request")
     except Exception as e:
         logger.error(f"Error in bronn_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing request")
 
+@app.get("/indicators")
+async def all_indicators():
+    return await asyncio.to_thread(indicator_engine.all)
+
+@app.get("/indicators/{ticker}")
+async def ticker_indicators(ticker: str):
+    try:
+        return await asyncio.to_thread(indicator_engine.latest, ticker.upper())
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No price history for {ticker}")
+
+@app.get("/metrics/forecast-cache")
+async def forecast_cache_metrics():
+    return forecast_cache.stats()
+
+@app.get("/metrics/content-cache")
+async def content_cache_metrics():
+    return content_cache.stats()
+
+@app.get("/metrics/compaction")
+async def compaction_metrics():
+    return compaction_stats.stats()
+
+@app.get("/metrics/news-parser")
+async def news_parser_metrics():
+    return news_parser_stats.stats()
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return llm_limiter.stats()
+
+@app.get("/metrics/coalescing")
+async def coalescing_metrics():
+    return response_cache.stats()
+
+@app.get("/metrics/router")
+async def router_metrics():
+    return intent_router.stats()
+
+@app.get("/metrics/speculation")
+async def speculation_metrics_endpoint():
+    return speculation_metrics.stats()
+
+@app.get("/metrics/price-snapshot")
+async def price_snapshot_metrics():
+    return suggester.snapshot.stats()
+
+@app.get("/metrics/prediction-pool")
+async def prediction_pool_metrics():
+    return prediction_pool.stats()
+
+def stream_event(event: str, data=None, **fields) -> str:
+    return json.dumps(jsonable_encoder({"event": event, "data": data, **fields})) + "\n"
+
+def report_data(report) -> dict:
+    return {
+        "introduction": report.introduction,
+        "insights": report.insights,
+        "conclusion": report.conclusion
+    }
+
+async def bronn_event_stream(user_prompt: UserPrompt):
+    try:
+        bronn_response = await intent_router.route(user_prompt.query, fallback=bronn_orchestrator)
+        yield stream_event("route", bronn_response.response)
+
+        if bronn_response.response == "0":
+            news_response = await fetch_news(user_prompt)
+            yield stream_event("news", {
+                "intro": news_response.news.intro,
+                "conclusion": news_response.news.conclusion,
+                "articles": news_response.news.articles,
+            })
+            async for index, article in iter_processed_articles(news_response.news.articles, user_prompt.query):
+                yield stream_event("article", article, index=index)
+        elif bronn_response.response == "1":
+            full_prediction, reduced_prediction, stock_name = await predict_stock(user_prompt.query)
+            yield stream_event("prediction", full_prediction)
+            report = await generate_stock_report(reduced_prediction, stock_name)
+            yield stream_event("report", report_data(report))
+        elif bronn_response.response == "2":
+            detailed_results, allocation = await find_suggestions(user_prompt.query)
+            yield stream_event("suggested_stocks", detailed_results)
+            if allocation is not None:
+                yield stream_event("allocation", allocation)
+            suggestion_report = await generate_suggestion_report(detailed_results, allocation)
+            yield stream_event("report", suggestion_report)
+        elif bronn_response.response == "3":
+            full_predictions, reduced_predictions, stock_names = await compare_stocks(user_prompt.query)
+            yield stream_event("predictions", full_predictions)
+            report = await generate_comparison_report(reduced_predictions, stock_names)
+            yield stream_event("report", report_data(report))
+        else:
+            yield stream_event("general", bronn_response.response)
+
+        yield stream_event("done")
+    except HTTPException as he:
+        logger.error(f"Error in bronn_stream: {he.detail}")
+        yield stream_event("error", he.detail, status_code=he.status_code)
+    except Exception as e:
+        logger.error(f"Error in bronn_stream: {str(e)}")
+        yield stream_event("error", "Error processing request", status_code=500)
+
+@app.post("/bronn/stream")
+async def bronn_stream(user_prompt: UserPrompt):
+    return StreamingResponse(bronn_event_stream(user_prompt), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app)
\ No newline at end of file
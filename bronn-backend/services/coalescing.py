@@ -0,0 +1,46 @@
+import os
+import re
+from datetime import date
+from typing import Hashable, Optional
+from services.entity_extractor import extract_amount, extract_stock_time, extract_stocks_time, is_budget_query
+from services.single_flight import SingleFlightCache
+from services.intent_router import IntentRouter, intent_router
+
+RESPONSE_CACHE_TTL = float(os.getenv("BRONN_RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("BRONN_RESPONSE_CACHE_SIZE", "512"))
+
+PUNCTUATION = re.compile(r"[^\w\s₹&.]")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(PUNCTUATION.sub(" ", query.lower()).split()).strip(" .")
+
+
+def request_key(query: str, router: IntentRouter = intent_router, today: Optional[date] = None) -> Hashable:
+    """Key under which equivalent /bronn queries share one computation.
+
+    When the local router is confident, queries collapse to their intent plus
+    everything the handler reads from them ("Will TCS rise tomorrow" and "tcs
+    prediction for tomorrow" are both a forecast for TCS.NS on one date). News
+    searches Google with the query text itself, and anything else only matches
+    on its normalized text.
+    """
+    today = today or date.today()
+    route, _, _ = router.classify(query)
+    if route == "1":
+        entities = extract_stock_time(query, today)
+        if entities:
+            return ("predict", entities[0], entities[1].isoformat())
+    elif route == "2":
+        amount = extract_amount(query)
+        if amount is not None:
+            # Only budget queries get an allocation, so they can't share a response with plain price searches.
+            return ("suggest", amount, is_budget_query(query))
+    elif route == "3":
+        entities = extract_stocks_time(query, today)
+        if entities:
+            return ("compare", tuple(sorted(entities[0])), entities[1].isoformat())
+    return ("text", normalize_query(query), today.isoformat())
+
+
+response_cache = SingleFlightCache(ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_SIZE)
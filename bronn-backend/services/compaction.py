@@ -0,0 +1,223 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+from services.entity_extractor import TICKER_ALIASES, find_tickers
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("BRONN_TOKEN_BUDGET", "3000"))
+# Budgets for the scraped text alone; the prompt template and the answer need the rest of the context window.
+MODEL_TOKEN_BUDGETS: Dict[str, int] = {
+    "llama3-70b-8192": 5000,
+    "gemma2-9b-it": 5000,
+    "mixtral-8x7b-32768": 8000,
+    "gpt-4o": 3000,
+}
+ARTICLE_MIN_WORDS = 5
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE = re.compile(
+    r"\b(cookies?|privacy policy|terms of (use|service)|all rights reserved|copyright|©|subscribe|newsletter|"
+    r"sign (in|up)|log ?in|create an account|download (the|our) app|follow us|share (this|on)|advertisement|"
+    r"sponsored|read more|click here|also read|recommended for you|trending now|you may also like|"
+    r"catch all the|skip to (main )?content|accessibility)\b",
+    re.IGNORECASE,
+)
+LINK_ANNOTATION = re.compile(r"\s*\(((?:https?://|/)[^\s)]*)\)")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(₹])")
+WORD = re.compile(r"[a-z0-9₹%]+")
+FACT = re.compile(r"\d|₹|%|\brs\b", re.IGNORECASE)
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "by", "for", "from", "how", "in", "is", "it", "me", "news",
+    "of", "on", "or", "share", "shares", "stock", "stocks", "tell", "the", "to", "what", "will", "with", "about",
+}
+
+
+def token_budget(model: str) -> int:
+    override = os.getenv("BRONN_TOKEN_BUDGET_" + re.sub(r"[^A-Z0-9]", "_", model.upper()))
+    return int(override) if override else MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+_encodings: Dict[str, object] = {}
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Exact count with tiktoken when installed; other providers' tokenizers are close enough to cl100k."""
+    if tiktoken is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("cl100k_base")
+    return len(_encodings[model].encode(text, disallowed_special=()))
+
+
+def _clean_link(href: str) -> Optional[str]:
+    # Google result links wrap the target in /url?q=...; its own navigation links are noise.
+    if href.startswith("/url?"):
+        return parse_qs(urlsplit(href).query).get("q", [None])[0]
+    if href.startswith("/"):
+        return None
+    return href
+
+
+def _sentence_key(sentence: str) -> str:
+    return " ".join(WORD.findall(sentence.lower()))
+
+
+def query_terms(query: str) -> Set[str]:
+    terms = {word for word in WORD.findall(query.lower()) if word not in STOPWORDS and len(word) > 1}
+    for ticker in find_tickers(query):
+        terms.add(ticker.split(".")[0].lower())
+        for alias in TICKER_ALIASES.get(ticker, ()):
+            terms.update(WORD.findall(alias))
+    return terms - STOPWORDS
+
+
+def token_batches(texts: List[str], budget: int, max_items: int, model: str = "gpt-4o") -> List[List[int]]:
+    """Group text indices in order so each group stays within `budget` tokens and `max_items` texts."""
+    batches: List[List[int]] = []
+    used = 0
+    for index, text in enumerate(texts):
+        tokens = count_tokens(text, model)
+        if not batches or len(batches[-1]) >= max_items or (used + tokens > budget and batches[-1]):
+            batches.append([])
+            used = 0
+        batches[-1].append(index)
+        used += tokens
+    return batches
+
+
+class ContentCompactor:
+    """Shrinks scraped text to a token budget before it goes into a prompt.
+
+    One compactor per request: sentences already kept for one article are dropped
+    from the next, so syndicated copies of the same wire story cost tokens once.
+    Articles are compacted in worker threads at the same time, so each call works
+    on its own copy of the kept sentences and merges its picks back under a lock.
+    """
+
+    def __init__(self):
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _blocks(self, text: str, keep_links: bool, min_words: int) -> List[str]:
+        blocks = []
+        for block in text.split("\n"):
+            if keep_links:
+                block = LINK_ANNOTATION.sub(lambda m: f" ({link})" if (link := _clean_link(m.group(1))) else "", block)
+            else:
+                block = LINK_ANNOTATION.sub("", block)
+            block = " ".join(block.split())
+            if not block or len(block.split()) < min_words:
+                continue
+            if BOILERPLATE.search(block) and len(block.split()) < 40:
+                continue
+            blocks.append(block)
+        return blocks
+
+    def _sentences(self, blocks: List[str]) -> List[str]:
+        sentences = []
+        for block in blocks:
+            sentences.extend(part for part in SENTENCE_BOUNDARY.split(block) if part)
+        return sentences
+
+    def _rank(self, sentences: List[str], terms: Set[str]) -> List[float]:
+        scores = []
+        for position, sentence in enumerate(sentences):
+            words = Counter(WORD.findall(sentence.lower()))
+            relevance = sum(min(words[term], 2) for term in terms)
+            score = 2.0 * relevance + (0.5 if FACT.search(sentence) else 0.0)
+            # Ledes carry the story; later sentences need more relevance to make the cut.
+            scores.append(score + 1.0 / (1 + 0.1 * position))
+        return scores
+
+    def compact(
+        self,
+        text: str,
+        query: str,
+        model: str,
+        keep_links: bool = False,
+        rank: bool = True,
+        min_words: int = ARTICLE_MIN_WORDS,
+        label: str = "content",
+    ) -> str:
+        budget = token_budget(model)
+        before = count_tokens(text, model)
+        with self._lock:
+            seen = set(self._seen)
+
+        sentences = self._sentences(self._blocks(text, keep_links, min_words))
+        # Short fragments (sources, timestamps on a results page) repeat legitimately and are never deduplicated.
+        keys = [_sentence_key(sentence) if len(sentence.split()) >= ARTICLE_MIN_WORDS else None for sentence in sentences]
+        fresh = [i for i, key in enumerate(keys) if key is None or key not in seen]
+        # An article that is entirely a copy of another still needs enough text to summarize on its own.
+        if len(fresh) < min(3, len(sentences)):
+            fresh = list(range(len(sentences)))
+        unique = []
+        local = set()
+        for i in fresh:
+            if keys[i] is None or keys[i] not in local:
+                local.add(keys[i])
+                unique.append(i)
+
+        costs = [count_tokens(sentences[i], model) + 1 for i in unique]
+        if sum(costs) <= budget:
+            chosen = unique
+        else:
+            order = range(len(unique))
+            if rank:
+                scores = self._rank([sentences[i] for i in unique], query_terms(query))
+                order = sorted(order, key=lambda j: scores[j], reverse=True)
+            chosen, used = [], 0
+            for j in order:
+                if used + costs[j] > budget:
+                    if rank:
+                        continue
+                    break
+                chosen.append(unique[j])
+                used += costs[j]
+            chosen.sort()
+
+        with self._lock:
+            self._seen.update(keys[i] for i in chosen if keys[i] is not None)
+        compacted = "\n".join(sentences[i] for i in chosen)
+        after = count_tokens(compacted, model)
+        logger.info(f"Compacted {label} for {model}: {before} -> {after} tokens (budget {budget})")
+        compaction_stats.record(before, after)
+        return compacted
+
+
+class CompactionStats:
+    def __init__(self):
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def record(self, before: int, after: int) -> None:
+        self.calls += 1
+        self.tokens_in += before
+        self.tokens_out += after
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "calls": self.calls,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "saved_ratio": round(1 - self.tokens_out / self.tokens_in, 3) if self.tokens_in else None,
+            "tokenizer": "tiktoken" if tiktoken is not None else "approximate",
+        }
+
+
+compaction_stats = CompactionStats()
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_CACHE_PATH = os.getenv("BRONN_CONTENT_CACHE_PATH", "./cache/content.sqlite3")
+CONTENT_CACHE_MAX_BYTES = int(os.getenv("BRONN_CONTENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_TEXT_TTL = float(os.getenv("BRONN_PAGE_TEXT_TTL", str(24 * 3600)))
+SUMMARY_TTL = float(os.getenv("BRONN_SUMMARY_TTL", str(7 * 24 * 3600)))
+# Bump when the extracted page text changes shape (e.g. the block separator) so old entries are not reused.
+PAGE_TEXT_VERSION = "2"
+CONTENT_CACHE_BYPASS = os.getenv("BRONN_CONTENT_CACHE_BYPASS", "false").lower() == "true"
+
+# Exact names, so parameters that merely start with "ref" (e.g. "refresh", "reference") still tell pages apart.
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ocid", "ref", "ref_src", "ref_url", "referrer"}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(str(url).strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """SQLite-backed key/value cache with per-entry TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path: str = CONTENT_CACHE_PATH, max_bytes: int = CONTENT_CACHE_MAX_BYTES, bypass: bool = CONTENT_CACHE_BYPASS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if self.bypass:
+            return
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now + ttl, now),
+            )
+            self._evict(now)
+
+    # sqlite3 blocks, so async callers go through a worker thread instead of stalling the event loop.
+    async def aget(self, key: str) -> Optional[Any]:
+        if self.bypass:
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        if self.bypass:
+            return
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def _evict(self, now: float) -> None:
+        self.conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under the limit.
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def page_text_key(self, url: str, wanted_tags) -> str:
+        return f"page:{PAGE_TEXT_VERSION}:{normalize_url(url)}:{','.join(wanted_tags)}"
+
+    def summary_key(self, text: str, stock_name: str, prompt_version: str) -> str:
+        return f"summary:{text_hash(text)}:{stock_name.strip().lower()}:{prompt_version}"
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "bypass": self.bypass}
+
+
+content_cache = ContentCache()
@@ -0,0 +1,221 @@
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+TICKER_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "HDFCBANK.NS": ("hdfc bank", "hdfcbank", "hdfc"),
+    "RELIANCE.NS": ("reliance industries", "reliance", "ril"),
+    "ICICIBANK.NS": ("icici bank", "icicibank", "icici"),
+    "INFY.NS": ("infosys", "infy"),
+    "TCS.NS": ("tata consultancy services", "tata consultancy", "tcs"),
+    "LT.NS": ("larsen & toubro", "larsen and toubro", "larsen", "l&t", "l and t"),
+    "SUNPHARMA.NS": ("sun pharmaceutical industries", "sun pharmaceutical", "sun pharma", "sunpharma"),
+    "BHARTIARTL.NS": ("bharti airtel", "bhartiartl", "airtel", "bharti"),
+    "HINDUNILVR.NS": ("hindustan unilever", "hindunilvr", "hul"),
+    "DMART.NS": ("avenue supermarts", "d-mart", "dmart"),
+    "KOTAKBANK.NS": ("kotak mahindra bank", "kotak bank", "kotakbank", "kotak"),
+    "ASIANPAINT.NS": ("asian paints", "asianpaint", "asian paint"),
+    "MARUTI.NS": ("maruti suzuki", "maruti"),
+    "AXISBANK.NS": ("axis bank", "axisbank"),
+    "TITAN.NS": ("titan company", "titan"),
+    "BAJFINANCE.NS": ("bajaj finance", "bajfinance"),
+    "ITC.NS": ("itc",),
+    "SBIN.NS": ("state bank of india", "state bank", "sbin", "sbi"),
+    "WIPRO.NS": ("wipro",),
+    "HCLTECH.NS": ("hcl technologies", "hcl tech", "hcltech", "hcl"),
+    "ULTRACEMCO.NS": ("ultratech cement", "ultracemco", "ultratech"),
+    "TECHM.NS": ("tech mahindra", "techm"),
+    "NESTLEIND.NS": ("nestle india", "nestleind", "nestle"),
+    "POWERGRID.NS": ("power grid corporation", "power grid", "powergrid"),
+    "GRASIM.NS": ("grasim industries", "grasim"),
+    "ONGC.NS": ("oil and natural gas corporation", "ongc"),
+    "ADANIGREEN.NS": ("adani green energy", "adani green", "adanigreen"),
+    "JSWSTEEL.NS": ("jsw steel", "jswsteel", "jsw"),
+    "NTPC.NS": ("ntpc",),
+    "M&M.NS": ("mahindra & mahindra", "mahindra and mahindra", "m&m"),
+}
+
+
+def _build_alias_index(aliases: Dict[str, Tuple[str, ...]]) -> Tuple[Dict[str, str], "re.Pattern"]:
+    index = {}
+    for ticker, names in aliases.items():
+        index[ticker.lower()] = ticker
+        index[ticker.split(".")[0].lower()] = ticker
+        for name in names:
+            index[name] = ticker
+    # Longest alias first so "hdfc bank" wins over "hdfc" and "tech mahindra" over "mahindra".
+    alternatives = sorted(index, key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w&])(" + "|".join(re.escape(alias) for alias in alternatives) + r")(?![\w&])")
+    return index, pattern
+
+
+ALIAS_INDEX, ALIAS_PATTERN = _build_alias_index(TICKER_ALIASES)
+
+WEEKDAYS = {name.lower(): i for i, name in enumerate(calendar.day_name)}
+# "sun", "sat", "wed" also occur in company names ("Sun Pharma"), so abbreviations only count after next/this/coming.
+WEEKDAY_ABBREVIATIONS = {name.lower(): i for i, name in enumerate(calendar.day_abbr)}
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+WEEKDAY_NAMES = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+WEEKDAY_ABBREVIATION_NAMES = "|".join(WEEKDAY_ABBREVIATIONS)
+UNIT_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12}
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+DAY_MONTH_YEAR = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({MONTH_NAMES})\.?,?\s+(\d{{4}})\b")
+MONTH_DAY_YEAR = re.compile(rf"\b({MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b")
+RELATIVE_SPAN = re.compile(r"\b(?:in|within|after|over the next|next)\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|twelve)\s+(day|week|month|year)s?\b")
+SPAN_FROM_NOW = re.compile(r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|twelve)\s+(day|week|month|year)s?\s+(?:from now|later|ahead)\b")
+NEXT_UNIT = re.compile(r"\b(?:next|over the next|coming|this coming)\s+(week|month|quarter|year)\b")
+WEEKDAY_REF = re.compile(rf"\b(?:(next|this|coming)\s+({WEEKDAY_NAMES}|{WEEKDAY_ABBREVIATION_NAMES})|({WEEKDAY_NAMES}))\b")
+END_OF = re.compile(rf"\b(?:by\s+)?(?:the\s+)?end of\s+(?:the\s+)?(week|month|quarter|year|{MONTH_NAMES})\b")
+BY_MONTH = re.compile(rf"\b(?:by|in|until|till)\s+({MONTH_NAMES})(?:\s+(\d{{4}}))?\b")
+
+# A number is only money with a currency, a magnitude or a price cue next to it, so
+# "top 10 stocks", "Q2 results" and "stocks to buy in 2024" carry no amount.
+PRICE_CUES = r"under|below|less than|up to|upto|within|around|about|max(?:imum)?|budget(?: of)?|with|have|got|spend|invest|worth|priced(?: at)?"
+CURRENCY = r"₹|rs\.?|inr|rupees?"
+AMOUNT_PATTERN = re.compile(
+    rf"(?:\b({PRICE_CUES})\s+)?(?:({CURRENCY})\s*|(?<![\w.,]))(\d+(?:,\d+)*(?:\.\d+)?)"
+    rf"(?:\s*(k|thousand|lakhs?|lac|cr|crores?)\b)?(?:\s*({CURRENCY})(?!\w))?",
+)
+# "I have ₹50k to invest" is a budget to split; "stocks under ₹500" is only a price filter.
+BUDGET_CUES = re.compile(r"\b(invest(?:ing|ment)?|budget|portfolio|allocat\w*|diversif\w*|spend|put|split|savings|i have|i've got|with (?:₹|rs\.?|inr)?\s*\d)")
+AMOUNT_MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "cr": 10_000_000, "crore": 10_000_000, "crores": 10_000_000}
+
+
+def find_tickers(query: str) -> List[str]:
+    tickers = []
+    for match in ALIAS_PATTERN.finditer(query.lower()):
+        ticker = ALIAS_INDEX[match.group(1)]
+        if ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+def add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _span(count: str, unit: str, today: date) -> date:
+    n = UNIT_WORDS.get(count) or int(count)
+    if unit == "day":
+        return today + timedelta(days=n)
+    if unit == "week":
+        return today + timedelta(weeks=n)
+    if unit == "month":
+        return add_months(today, n)
+    return add_months(today, 12 * n)
+
+
+def _end_of(unit: str, today: date) -> date:
+    if unit == "week":
+        return today + timedelta(days=6 - today.weekday())
+    if unit == "month":
+        return date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+    if unit == "quarter":
+        month = ((today.month - 1) // 3 + 1) * 3
+        return date(today.year, month, calendar.monthrange(today.year, month)[1])
+    if unit == "year":
+        return date(today.year, 12, 31)
+    month = MONTHS[unit]
+    year = today.year if month >= today.month else today.year + 1
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_date(query: str, today: Optional[date] = None) -> Optional[date]:
+    """Resolve the first absolute or relative date in the query against `today`."""
+    today = today or date.today()
+    text = query.lower()
+
+    try:
+        if match := ISO_DATE.search(text):
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if match := DAY_MONTH_YEAR.search(text):
+            return date(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+        if match := MONTH_DAY_YEAR.search(text):
+            return date(int(match.group(3)), MONTHS[match.group(1)], int(match.group(2)))
+    except ValueError:
+        return None
+
+    if "day after tomorrow" in text:
+        return today + timedelta(days=2)
+    if re.search(r"\btomorrow\b", text):
+        return today + timedelta(days=1)
+    if re.search(r"\btoday\b", text):
+        return today
+    if match := RELATIVE_SPAN.search(text) or SPAN_FROM_NOW.search(text):
+        return _span(match.group(1), match.group(2), today)
+    if match := END_OF.search(text):
+        return _end_of(match.group(1), today)
+    if match := NEXT_UNIT.search(text):
+        unit = match.group(1)
+        if unit == "quarter":
+            return add_months(today, 3)
+        return _span("1", unit, today)
+    if match := WEEKDAY_REF.search(text):
+        name = match.group(2) or match.group(3)
+        target = WEEKDAYS.get(name, WEEKDAY_ABBREVIATIONS.get(name))
+        days_ahead = (target - today.weekday()) % 7 or 7
+        # "next Friday" said on a Monday means the Friday of the following week.
+        if match.group(1) == "next" and days_ahead < 7 and today.weekday() < target:
+            days_ahead += 7
+        return today + timedelta(days=days_ahead)
+    if match := BY_MONTH.search(text):
+        month = MONTHS[match.group(1)]
+        year = int(match.group(2)) if match.group(2) else (today.year if month >= today.month else today.year + 1)
+        return date(year, month, calendar.monthrange(year, month)[1])
+    return None
+
+
+def parse_amounts(query: str) -> List[int]:
+    text = query.lower()
+    # Dates are not money.
+    text = ISO_DATE.sub(" ", text)
+    text = DAY_MONTH_YEAR.sub(" ", text)
+    text = MONTH_DAY_YEAR.sub(" ", text)
+    text = RELATIVE_SPAN.sub(" ", text)
+    text = SPAN_FROM_NOW.sub(" ", text)
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        cue, prefix, number, magnitude, suffix = match.groups()
+        if not (cue or prefix or magnitude or suffix):
+            continue
+        value = float(number.replace(",", ""))
+        multiplier = AMOUNT_MULTIPLIERS.get(magnitude or "", 1)
+        amount = int(round(value * multiplier))
+        if amount and amount not in amounts:
+            amounts.append(amount)
+    return amounts
+
+
+def extract_stock_time(query: str, today: Optional[date] = None, default_days: int = 7) -> Optional[Tuple[str, date]]:
+    """Return (ticker, date) when the query names exactly one stock, else None so the LLM decides."""
+    tickers = find_tickers(query)
+    if len(tickers) != 1:
+        return None
+    today = today or date.today()
+    return tickers[0], parse_date(query, today) or today + timedelta(days=default_days)
+
+
+def extract_stocks_time(query: str, today: Optional[date] = None, default_days: int = 7) -> Optional[Tuple[List[str], date]]:
+    tickers = find_tickers(query)
+    if len(tickers) < 2:
+        return None
+    today = today or date.today()
+    return tickers, parse_date(query, today) or today + timedelta(days=default_days)
+
+
+def is_budget_query(query: str) -> bool:
+    # "best stocks to invest in 2024" mentions investing but names no budget.
+    return bool(BUDGET_CUES.search(query.lower())) and bool(parse_amounts(query))
+
+
+def extract_amount(query: str) -> Optional[int]:
+    """Return the single rupee amount in the query, or None when there is none or several."""
+    amounts = parse_amounts(query)
+    return amounts[0] if len(amounts) == 1 else None
@@ -0,0 +1,13 @@
+import os
+from services.single_flight import SingleFlightCache
+
+FORECAST_CACHE_TTL = float(os.getenv("BRONN_FORECAST_CACHE_TTL", "3600"))
+FORECAST_CACHE_SIZE = int(os.getenv("BRONN_FORECAST_CACHE_SIZE", "256"))
+
+
+class ForecastCache(SingleFlightCache):
+    def __init__(self, ttl: float = FORECAST_CACHE_TTL, max_entries: int = FORECAST_CACHE_SIZE):
+        super().__init__(ttl, max_entries)
+
+
+forecast_cache = ForecastCache()
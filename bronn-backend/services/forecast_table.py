@@ -0,0 +1,145 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from services.model_registry import model_registry
+from services.price_store import price_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORECAST_TABLE_DIR = os.getenv("BRONN_FORECAST_TABLE_DIR", "./forecasts")
+FORECAST_TABLE_HORIZON = date.fromisoformat(os.getenv("BRONN_FORECAST_TABLE_HORIZON", "2025-12-31"))
+MANIFEST_NAME = "manifest.json"
+
+
+class ForecastTable:
+    """Precomputed forecasts, one compact .npz per ticker plus a manifest of fingerprints.
+
+    A ticker's table is only used while its model and price-history fingerprints
+    still match the ones it was built from.
+    """
+
+    def __init__(self, table_dir: str = FORECAST_TABLE_DIR):
+        self.table_dir = table_dir
+        self._lock = threading.Lock()
+        self._manifest_mtime: Optional[int] = None
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._tables: Dict[str, Tuple[str, Dict[str, np.ndarray]]] = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.table_dir, MANIFEST_NAME)
+
+    def table_path(self, ticker: str) -> str:
+        return os.path.join(self.table_dir, f"{ticker}_forecast.npz")
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    def _is_current(self, ticker: str, entry: Dict[str, Any]) -> bool:
+        try:
+            return (
+                entry["model_fingerprint"] == model_registry.fingerprint(ticker)
+                and entry["data_fingerprint"] == price_store.ticker_fingerprint(ticker)
+            )
+        except (OSError, KeyError):
+            return False
+
+    def lookup(self, ticker: str, target_date: date) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        from services.stock_prediction import prediction_days, summarize_arrays
+
+        entry = self._load_manifest().get(ticker)
+        if entry is None or not self._is_current(ticker, entry):
+            return None
+        if target_date > date.fromisoformat(entry["horizon"]):
+            return None
+
+        with self._lock:
+            cached = self._tables.get(ticker)
+        if cached is None or cached[0] != entry["built_at"]:
+            # Lookups run in worker threads; two of them may load the same table, but each stores a whole entry.
+            with np.load(self.table_path(ticker)) as data:
+                arrays = {name: data[name] for name in data.files}
+            cached = (entry["built_at"], arrays)
+            with self._lock:
+                self._tables[ticker] = cached
+        arrays = cached[1]
+
+        # Same prefix rule as compute_predictions: drop the rows past this target's horizon.
+        n = int(prediction_days([target_date])[0])
+        end = len(arrays["yhat1"]) - (int(entry["horizon_days"]) - n)
+        return summarize_arrays(arrays["ds"][:end], arrays["yhat1"][:end], arrays["trend"][:end], n)
+
+    def refresh(self, tickers: List[str], horizon: date = FORECAST_TABLE_HORIZON, force: bool = False) -> List[str]:
+        from services.stock_prediction import forecast_frame, prediction_days
+
+        os.makedirs(self.table_dir, exist_ok=True)
+        manifest = dict(self._load_manifest())
+        horizon_days = int(prediction_days([horizon])[0])
+        refreshed = []
+
+        for ticker in tickers:
+            entry = manifest.get(ticker)
+            if (
+                not force
+                and entry is not None
+                and entry["horizon"] == horizon.isoformat()
+                and self._is_current(ticker, entry)
+            ):
+                logger.info(f"Forecast table for {ticker} is up to date")
+                continue
+            try:
+                forecast = forecast_frame(ticker, horizon_days + 2)
+                np.savez(
+                    self.table_path(ticker),
+                    ds=forecast["ds"].to_numpy(dtype="datetime64[D]"),
+                    yhat1=forecast["yhat1"].to_numpy(dtype=np.float64),
+                    trend=forecast["trend"].to_numpy(dtype=np.float64),
+                )
+                manifest[ticker] = {
+                    "model_fingerprint": model_registry.fingerprint(ticker),
+                    "data_fingerprint": price_store.ticker_fingerprint(ticker),
+                    "horizon": horizon.isoformat(),
+                    "horizon_days": horizon_days,
+                    "built_at": str(os.stat(self.table_path(ticker)).st_mtime_ns),
+                }
+                refreshed.append(ticker)
+                logger.info(f"Refreshed forecast table for {ticker}")
+            except Exception as e:
+                logger.error(f"Error refreshing forecast table for {ticker}: {str(e)}")
+
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        return refreshed
+
+
+forecast_table = ForecastTable()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecasts for every ticker up to a horizon date.")
+    parser.add_argument("--horizon", type=date.fromisoformat, default=FORECAST_TABLE_HORIZON, help="Last date to forecast (YYYY-MM-DD)")
+    parser.add_argument("--tickers", nargs="*", help="Tickers to refresh (default: every ticker with a model)")
+    parser.add_argument("--force", action="store_true", help="Recompute even if model and data are unchanged")
+    args = parser.parse_args()
+    if not args.tickers:
+        args.tickers = [ticker for ticker in price_store.tickers if os.path.exists(model_registry.model_path(ticker))]
+
+    refreshed = forecast_table.refresh(args.tickers, horizon=args.horizon, force=args.force)
+    logger.info(f"Refreshed {len(refreshed)} of {len(args.tickers)} tickers")
@@ -0,0 +1,127 @@
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+DEFAULT_UNWANTED_TAGS = ("script", "style")
+
+
+class _TextCollector:
+    """Collects text of wanted tags in document order, skipping unwanted subtrees.
+
+    Text is attributed to the outermost open wanted element only, so nested
+    wanted tags are not emitted twice. A link nested in another wanted element
+    still contributes its `(href)` annotation to that element's text.
+    """
+
+    def __init__(self, wanted_tags: Iterable[str], unwanted_tags: Iterable[str]):
+        self.wanted = set(wanted_tags)
+        self.unwanted = set(unwanted_tags)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._stack: List[tuple] = []
+        self._buffer: List[str] = []
+
+    def start(self, tag: str, href: Optional[str]) -> None:
+        if tag in self.unwanted:
+            self._skip_depth += 1
+            return
+        if self._skip_depth or tag not in self.wanted:
+            return
+        # <p> can't nest, so an open <p> is implicitly closed by the next one.
+        if tag == "p" and self._stack and self._stack[-1][0] == "p":
+            self.end("p")
+        self._stack.append((tag, href))
+
+    def end(self, tag: str) -> None:
+        if tag in self.unwanted:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth or tag not in self.wanted:
+            return
+        for position in range(len(self._stack) - 1, -1, -1):
+            if self._stack[position][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > position:
+            open_tag, href = self._stack.pop()
+            if open_tag == "a" and href:
+                self._buffer.append(f" ({href})")
+            if not self._stack:
+                self.parts.append("".join(self._buffer))
+                self._buffer = []
+
+    def data(self, text: str) -> None:
+        if self._stack and not self._skip_depth:
+            self._buffer.append(text)
+
+    def close(self, separator: str = " ") -> str:
+        while self._stack:
+            self.end(self._stack[-1][0])
+        seen = set()
+        lines = []
+        for line in separator.join(self.parts).split("\n"):
+            line = line.strip()
+            if line and line not in seen:
+                seen.add(line)
+                lines.append(line)
+        return separator.join(lines)
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs).get("href") if tag == "a" else None)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class _LxmlTarget:
+    def __init__(self, collector: _TextCollector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, attrib.get("href") if tag == "a" else None)
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return None
+
+
+def extract_text(
+    html_content: str,
+    wanted_tags: Iterable[str],
+    unwanted_tags: Iterable[str] = DEFAULT_UNWANTED_TAGS,
+    backend: Optional[str] = None,
+    separator: str = " ",
+) -> str:
+    """Text of the wanted tags; `separator="\n"` keeps one block per line for later compaction."""
+    backend = backend or ("lxml" if etree is not None else "html.parser")
+    collector = _TextCollector(wanted_tags, unwanted_tags)
+    if backend == "lxml":
+        if etree is None:
+            raise ImportError("lxml is not installed")
+        parser = etree.HTMLParser(target=_LxmlTarget(collector))
+        parser.feed(html_content)
+        parser.close()
+    else:
+        parser = _StdlibParser(collector)
+        parser.feed(html_content)
+        parser.close()
+    return collector.close(separator)
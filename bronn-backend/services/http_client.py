@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = float(os.getenv("BRONN_FETCH_TIMEOUT", "10"))
+FETCH_RETRIES = int(os.getenv("BRONN_FETCH_RETRIES", "2"))
+FETCH_BACKOFF = float(os.getenv("BRONN_FETCH_BACKOFF", "0.5"))
+FETCH_MAX_BYTES = int(os.getenv("BRONN_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+FETCH_PER_HOST = int(os.getenv("BRONN_FETCH_PER_HOST", "4"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("BRONN_FETCH_MAX_CONNECTIONS", "50"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class AsyncFetcher:
+    """Shared keep-alive HTTP client with per-host limits, retries and a response size cap."""
+
+    def __init__(
+        self,
+        timeout: float = FETCH_TIMEOUT,
+        retries: int = FETCH_RETRIES,
+        backoff: float = FETCH_BACKOFF,
+        max_bytes: int = FETCH_MAX_BYTES,
+        per_host: int = FETCH_PER_HOST,
+        max_connections: int = FETCH_MAX_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                http2=self.transport is None and _http2_available(),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                transport=self.transport,
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _fetch_once(self, url: str) -> str:
+        async with self.client.stream("GET", url) as response:
+            if response.status_code in RETRY_STATUSES:
+                raise httpx.HTTPStatusError(f"Retryable status {response.status_code}", request=response.request, response=response)
+            response.raise_for_status()
+
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    # Keep what fits; the head of an article page carries the text we need.
+                    chunks.append(chunk[: len(chunk) - (size - self.max_bytes)])
+                    logger.info(f"Truncated response from {url} at {self.max_bytes} bytes")
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+    async def fetch_text(self, url: str) -> str:
+        url = str(url)
+        async with self._host_limit(url):
+            for attempt in range(self.retries + 1):
+                try:
+                    return await self._fetch_once(url)
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                    if not retryable or attempt == self.retries:
+                        raise FetchError(f"Error fetching {url}: {str(e)}") from e
+                    delay = self.backoff * (2 ** attempt)
+                    logger.info(f"Retrying {url} in {delay:.2f}s after: {str(e)}")
+                    await asyncio.sleep(delay)
+
+    async def probe(self, url: str) -> bool:
+        """True if the URL answers 200 to a HEAD request; no retries, errors count as missing."""
+        url = str(url)
+        async with self._host_limit(url):
+            try:
+                response = await self.client.head(url)
+                return response.status_code == 200
+            except httpx.HTTPError as e:
+                logger.info(f"Probe failed for {url}: {str(e)}")
+                return False
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+fetcher = AsyncFetcher()
@@ -0,0 +1,199 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from services.price_store import PriceStore, price_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (12, 20, 26, 50)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2.0
+CLOSE_WINDOW = max(SMA_WINDOWS + (BOLLINGER_WINDOW,))
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _ewm(previous: np.ndarray, value: np.ndarray, alpha: float, mask: np.ndarray) -> np.ndarray:
+    # Seeded with the first observation, like pandas ewm(adjust=False).
+    updated = np.where(np.isnan(previous), value, previous + alpha * (value - previous))
+    return np.where(mask & np.isfinite(value), updated, previous)
+
+
+class IndicatorEngine:
+    """Technical indicators for every ticker, kept as running state over the price history.
+
+    Each bar advances the state of all tickers at once (EMAs, Wilder averages for RSI
+    and ATR, running peak, a ring buffer of recent closes), so new bars cost O(tickers)
+    and a query only reads the latest values.
+    """
+
+    def __init__(self, store: PriceStore = price_store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._latest: Optional[Dict[str, np.ndarray]] = None
+        self._reset([])
+
+    def _reset(self, tickers: List[str]) -> None:
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self._columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        nan = lambda: np.full(n, np.nan)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.last_date = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.bar = {column: nan() for column in BAR_COLUMNS}
+        self.closes = np.full((CLOSE_WINDOW, n), np.nan)
+        self.position = np.zeros(n, dtype=np.int64)
+        self.ema = {span: nan() for span in EMA_SPANS}
+        self.macd_signal = nan()
+        self.avg_gain = nan()
+        self.avg_loss = nan()
+        self.atr = nan()
+        self.peak = nan()
+        self.max_drawdown = nan()
+        self._latest = None
+
+    def _advance(self, date: np.datetime64, bar: Dict[str, np.ndarray]) -> None:
+        close, high, low = bar["Close"], bar["High"], bar["Low"]
+        mask = np.isfinite(close)
+        if not mask.any():
+            return
+        previous_close = self.bar["Close"]
+
+        for span in EMA_SPANS:
+            self.ema[span] = _ewm(self.ema[span], close, 2 / (span + 1), mask)
+        macd = self.ema[MACD_FAST] - self.ema[MACD_SLOW]
+        self.macd_signal = _ewm(self.macd_signal, macd, 2 / (MACD_SIGNAL + 1), mask)
+
+        delta = close - previous_close
+        self.avg_gain = _ewm(self.avg_gain, np.maximum(delta, 0), 1 / RSI_PERIOD, mask)
+        self.avg_loss = _ewm(self.avg_loss, np.maximum(-delta, 0), 1 / RSI_PERIOD, mask)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+        self.atr = _ewm(self.atr, true_range, 1 / ATR_PERIOD, mask)
+
+        self.peak = np.where(mask, np.fmax(self.peak, close), self.peak)
+        self.max_drawdown = np.where(mask, np.fmin(self.max_drawdown, close / self.peak - 1), self.max_drawdown)
+
+        columns = np.flatnonzero(mask)
+        self.closes[self.position[columns], columns] = close[columns]
+        self.position[columns] = (self.position[columns] + 1) % CLOSE_WINDOW
+        self.count[columns] += 1
+        self.last_date[columns] = date
+        for column, values in bar.items():
+            self.bar[column] = np.where(mask, values, self.bar[column])
+        self._latest = None
+
+    def _apply(self, rows: pd.DataFrame) -> None:
+        """Advance the state with long Date/Ticker/OHLCV rows, one date at a time."""
+        wide = rows.pivot_table(index="Date", columns="Ticker", values=BAR_COLUMNS, aggfunc="last").sort_index()
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([BAR_COLUMNS, self.tickers]))
+        arrays = {column: wide[column].to_numpy(dtype=np.float64) for column in BAR_COLUMNS}
+        for row, date in enumerate(wide.index.to_numpy(dtype="datetime64[ns]")):
+            self._advance(date, {column: values[row] for column, values in arrays.items()})
+
+    def _last_seen(self, tickers: pd.Series) -> np.ndarray:
+        # NaT for tickers the engine hasn't seen a bar for yet.
+        last_date = pd.Series(self.last_date, index=self.tickers, dtype="datetime64[ns]")
+        return last_date.reindex(tickers.to_numpy()).to_numpy(dtype="datetime64[ns]")
+
+    def append(self, rows: pd.DataFrame) -> int:
+        """Apply bars newer than each ticker's last seen date; returns how many were applied."""
+        with self._lock:
+            return self._append(rows)
+
+    def _append(self, rows: pd.DataFrame) -> int:
+        rows = rows[rows["Ticker"].isin(self._columns)]
+        last_seen = self._last_seen(rows["Ticker"])
+        rows = rows[np.isnat(last_seen) | (rows["Date"].to_numpy() > last_seen)]
+        if len(rows):
+            self._apply(rows)
+        return len(rows)
+
+    def refresh(self) -> None:
+        fingerprint = self.store.fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            frame = self.store.frame()
+            tickers = list(dict.fromkeys(frame["Ticker"]))
+            last_seen = self._last_seen(frame["Ticker"])
+            seen_counts = frame[frame["Date"].to_numpy() <= last_seen].groupby("Ticker").size()
+            unchanged_prefix = tickers[: len(self.tickers)] == self.tickers and all(
+                seen_counts.get(ticker, 0) == count for ticker, count in zip(self.tickers, self.count)
+            )
+            if self.tickers and unchanged_prefix and set(tickers) == set(self.tickers):
+                applied = self._append(frame)
+                logger.info(f"Applied {applied} new bars to indicators")
+            else:
+                logger.info(f"Computing indicators for {len(tickers)} tickers")
+                self._reset(tickers)
+                self._apply(frame)
+            self._fingerprint = fingerprint
+
+    def _compute(self) -> Dict[str, np.ndarray]:
+        close = self.bar["Close"]
+        columns = np.arange(len(self.tickers))
+        # Most recent closes first, per ticker, out of the ring buffer.
+        recent = self.closes[(self.position[None, :] - 1 - np.arange(CLOSE_WINDOW)[:, None]) % CLOSE_WINDOW, columns[None, :]]
+        values = {"close": close}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for window in SMA_WINDOWS:
+                values[f"sma_{window}"] = np.where(self.count >= window, recent[:window].mean(axis=0), np.nan)
+            for span in EMA_SPANS:
+                values[f"ema_{span}"] = self.ema[span]
+            macd = self.ema[MACD_FAST] - self.ema[MACD_SLOW]
+            values["macd"] = macd
+            values["macd_signal"] = self.macd_signal
+            values["macd_histogram"] = macd - self.macd_signal
+            rsi = np.where(self.avg_loss == 0, 100.0, 100 - 100 / (1 + self.avg_gain / self.avg_loss))
+            values["rsi"] = np.where(self.count > RSI_PERIOD, rsi, np.nan)
+
+            window = recent[:BOLLINGER_WINDOW]
+            middle = window.mean(axis=0)
+            width = BOLLINGER_WIDTH * window.std(axis=0)
+            enough = self.count >= BOLLINGER_WINDOW
+            values["bollinger_middle"] = np.where(enough, middle, np.nan)
+            values["bollinger_upper"] = np.where(enough, middle + width, np.nan)
+            values["bollinger_lower"] = np.where(enough, middle - width, np.nan)
+            values["bollinger_percent_b"] = np.where(enough, (close - (middle - width)) / (2 * width), np.nan)
+
+            values["atr"] = np.where(self.count > ATR_PERIOD, self.atr, np.nan)
+            values["atr_percent"] = values["atr"] / close * 100
+            values["drawdown_percent"] = (close / self.peak - 1) * 100
+            values["max_drawdown_percent"] = self.max_drawdown * 100
+        return values
+
+    def latest(self, ticker: str) -> Dict[str, object]:
+        self.refresh()
+        if ticker not in self._columns:
+            raise KeyError(f"No indicators for {ticker}")
+        latest = self._latest = self._latest or self._compute()
+        column = self._columns[ticker]
+        values = {
+            name: None if np.isnan(array[column]) else round(float(array[column]), 4)
+            for name, array in latest.items()
+        }
+        return {"ticker": ticker, "date": str(self.last_date[column])[:10], "bars": int(self.count[column]), **values}
+
+    def all(self) -> List[Dict[str, object]]:
+        self.refresh()
+        return [self.latest(ticker) for ticker in self.tickers]
+
+    def describe(self, ticker: str) -> str:
+        """One line per indicator, for report prompts."""
+        try:
+            values = self.latest(ticker)
+        except KeyError:
+            return f"No price history available for {ticker}."
+        return "\n".join(f"{name}: {value}" for name, value in values.items() if value is not None)
+
+
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from data_models import BronnResponse
+from services.entity_extractor import find_tickers, parse_amounts, parse_date
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROUTER_CONFIDENCE = float(os.getenv("BRONN_ROUTER_CONFIDENCE", "0.75"))
+ROUTER_MODEL_PATH = os.getenv("BRONN_ROUTER_MODEL", "./models/intent_router.json")
+ROUTER_LOG_PATH = os.getenv("BRONN_ROUTER_LOG", "")
+ROUTER_ENABLED = os.getenv("BRONN_ROUTER_ENABLED", "true").lower() == "true"
+
+ROUTES = ("0", "1", "2", "3")
+
+GREETING_PATTERN = re.compile(r"^\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you)\b[\s!.?]*$")
+
+KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "0": ("news", "latest", "headline", "headlines", "update", "updates", "happening", "announce", "announcement", "why is", "why did"),
+    "1": ("predict", "prediction", "forecast", "price target", "target price", "go up", "go down", "expected", "future", "outlook"),
+    "2": ("suggest", "recommend", "which stock", "which stocks", "stocks under", "stocks below", "budget", "afford", "cheap", "invest", "buy with"),
+    "3": ("compare", "comparison", "vs", "versus", "better than", "which is better"),
+}
+KEYWORD_PATTERNS = {
+    route: re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")\b")
+    for route, words in KEYWORDS.items()
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z₹&]+|\d+")
+
+
+def tokenize(query: str) -> List[str]:
+    return TOKEN_PATTERN.findall(query.lower())
+
+
+class RuleClassifier:
+    """Keyword, company, date and amount patterns scored per route."""
+
+    def scores(self, query: str) -> Dict[str, float]:
+        text = query.lower()
+        scores = {route: float(len(KEYWORD_PATTERNS[route].findall(text))) for route in ROUTES}
+
+        companies = find_tickers(text)
+        has_date = parse_date(text) is not None
+        has_amount = bool(parse_amounts(text))
+
+        if len(companies) == 1 and has_date:
+            scores["1"] += 2.0
+        if len(companies) >= 2 and (scores["3"] or has_date):
+            scores["3"] += 3.0
+        if not companies and has_amount:
+            scores["2"] += 2.0
+        if companies and not has_date and not has_amount:
+            scores["0"] += 0.5
+        # Comparison words without two companies ("better than expected") are not a comparison.
+        if len(companies) < 2:
+            scores["3"] = 0.0
+        return scores
+
+    def classify(self, query: str) -> Tuple[Optional[str], float]:
+        scores = self.scores(query)
+        total = sum(scores.values())
+        if total == 0:
+            return None, 0.0
+        route = max(scores, key=scores.get)
+        top = scores[route]
+        # Confidence is the winning share, discounted when there is little evidence at all.
+        return route, (top / total) * min(1.0, top / 2.0)
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes over query tokens, trained from logged routing decisions."""
+
+    def __init__(self, priors: Dict[str, float], likelihoods: Dict[str, Dict[str, float]], unknown: Dict[str, float]):
+        self.priors = priors
+        self.likelihoods = likelihoods
+        self.unknown = unknown
+
+    @classmethod
+    def train(cls, samples: Iterable[Tuple[str, str]], alpha: float = 1.0) -> "NaiveBayesClassifier":
+        token_counts: Dict[str, Counter] = defaultdict(Counter)
+        route_counts: Counter = Counter()
+        vocabulary = set()
+        for query, route in samples:
+            tokens = tokenize(query)
+            token_counts[route].update(tokens)
+            route_counts[route] += 1
+            vocabulary.update(tokens)
+
+        total = sum(route_counts.values())
+        priors = {route: math.log(count / total) for route, count in route_counts.items()}
+        likelihoods = {}
+        unknown = {}
+        for route, counts in token_counts.items():
+            denominator = sum(counts.values()) + alpha * (len(vocabulary) + 1)
+            likelihoods[route] = {token: math.log((count + alpha) / denominator) for token, count in counts.items()}
+            unknown[route] = math.log(alpha / denominator)
+        return cls(priors, likelihoods, unknown)
+
+    def classify(self, query: str) -> Tuple[Optional[str], float]:
+        tokens = tokenize(query)
+        if not tokens or not self.priors:
+            return None, 0.0
+        log_scores = {
+            route: prior + sum(self.likelihoods[route].get(token, self.unknown[route]) for token in tokens)
+            for route, prior in self.priors.items()
+        }
+        best = max(log_scores.values())
+        weights = {route: math.exp(score - best) for route, score in log_scores.items()}
+        route = max(weights, key=weights.get)
+        return route, weights[route] / sum(weights.values())
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"priors": self.priors, "likelihoods": self.likelihoods, "unknown": self.unknown}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesClassifier":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["priors"], data["likelihoods"], data["unknown"])
+
+
+class IntentRouter:
+    def __init__(
+        self,
+        confidence: float = ROUTER_CONFIDENCE,
+        model_path: str = ROUTER_MODEL_PATH,
+        log_path: str = ROUTER_LOG_PATH,
+        enabled: bool = ROUTER_ENABLED,
+    ):
+        self.confidence = confidence
+        self.log_path = log_path
+        self.enabled = enabled
+        self.rules = RuleClassifier()
+        self.model: Optional[NaiveBayesClassifier] = None
+        if model_path and os.path.exists(model_path):
+            self.model = NaiveBayesClassifier.load(model_path)
+            logger.info(f"Loaded intent router model from {model_path}")
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.routes: Counter = Counter()
+        self.sources: Counter = Counter()
+
+    def classify(self, query: str) -> Tuple[Optional[str], float, str]:
+        if GREETING_PATTERN.match(query.lower()):
+            return None, 0.0, "llm"
+        route, confidence = self.rules.classify(query)
+        if route is not None and confidence >= self.confidence:
+            return route, confidence, "rules"
+        if self.model is not None:
+            model_route, model_confidence = self.model.classify(query)
+            if model_route is not None and model_confidence >= self.confidence:
+                return model_route, model_confidence, "model"
+        return None, confidence, "llm"
+
+    def _record(self, route: str, source: str) -> None:
+        with self._lock:
+            self.routes[route if route in ROUTES else "general"] += 1
+            self.sources[source] += 1
+
+    def _log_decision(self, query: str, route: str) -> None:
+        if not self.log_path or route not in ROUTES:
+            return
+        try:
+            with self._log_lock, open(self.log_path, "a") as f:
+                f.write(json.dumps({"query": query, "route": route}) + "\n")
+        except OSError as e:
+            logger.error(f"Error logging routing decision: {str(e)}")
+
+    async def route(self, query: str, fallback: Callable[[str], Awaitable[BronnResponse]]) -> BronnResponse:
+        if self.enabled:
+            route, confidence, source = self.classify(query)
+            if route is not None:
+                self._record(route, source)
+                return BronnResponse(response=route)
+
+        response = await fallback(query)
+        self._record(response.response, "llm")
+        # LLM decisions are the training labels for the on-disk model; the file write stays off the event loop.
+        if self.log_path:
+            await asyncio.to_thread(self._log_decision, query, response.response)
+        return response
+
+    def stats(self) -> Dict[str, object]:
+        total = sum(self.sources.values())
+        return {
+            "routes": dict(self.routes),
+            "sources": dict(self.sources),
+            "fallback_rate": round(self.sources["llm"] / total, 4) if total else 0.0,
+        }
+
+
+intent_router = IntentRouter()
+
+
+def load_samples(path: str) -> List[Tuple[str, str]]:
+    samples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                samples.append((record["query"], record["route"]))
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local intent router model from logged queries.")
+    parser.add_argument("log", help="JSONL file of {query, route} records (see BRONN_ROUTER_LOG)")
+    parser.add_argument("--output", default=ROUTER_MODEL_PATH, help="Where to write the model")
+    args = parser.parse_args()
+
+    samples = load_samples(args.log)
+    NaiveBayesClassifier.train(samples).save(args.output)
+    logger.info(f"Trained intent router on {len(samples)} queries, saved to {args.output}")
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Requests per minute. Groq limits each model separately, so its provider bucket only guards the account as a whole.
+PROVIDER_RATE_LIMITS: Dict[str, float] = {"groq": 120, "openai": 500}
+MODEL_RATE_LIMITS: Dict[str, float] = {
+    "mixtral-8x7b-32768": 30,
+    "llama3-70b-8192": 30,
+    "gemma2-9b-it": 30,
+    "gpt-4o": 500,
+    "gpt-4o-mini": 500,
+}
+DEFAULT_RATE_LIMIT = float(os.getenv("BRONN_LLM_RPM", "60"))
+LLM_INITIAL_CONCURRENCY = float(os.getenv("BRONN_LLM_INITIAL_CONCURRENCY", "4"))
+LLM_MAX_CONCURRENCY = int(os.getenv("BRONN_LLM_MAX_CONCURRENCY", os.getenv("BRONN_LLM_MAX_CONNECTIONS", "20")))
+LLM_LATENCY_TOLERANCE = float(os.getenv("BRONN_LLM_LATENCY_TOLERANCE", "2.0"))
+LLM_RATE_LIMIT_PAUSE = float(os.getenv("BRONN_LLM_RATE_LIMIT_PAUSE", "2"))
+
+TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailableError"}
+
+
+def _env_limit(prefix: str, name: str) -> Optional[float]:
+    override = os.getenv(prefix + re.sub(r"[^A-Z0-9]", "_", name.upper()))
+    return float(override) if override else None
+
+
+def rate_limit(provider: str, model: Optional[str] = None) -> float:
+    """Requests per minute for a provider, or for one of its models when `model` is given."""
+    if model is None:
+        override = _env_limit("BRONN_LLM_RPM_", provider)
+        return override if override is not None else PROVIDER_RATE_LIMITS.get(provider, DEFAULT_RATE_LIMIT)
+    override = _env_limit("BRONN_LLM_RPM_", model)
+    return override if override is not None else MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMIT)
+
+
+class LLMBusyError(Exception):
+    """No slot opened up for the model before the queue deadline."""
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    # The openai and groq SDKs both carry the HTTP status on the error and on its response.
+    for candidate in (getattr(error, "status_code", None), getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient(error: BaseException) -> bool:
+    """Failures another model might not have: throttling, provider outages and timeouts, but not bad output."""
+    if isinstance(error, (LLMBusyError, asyncio.TimeoutError, httpx.TransportError)) or is_rate_limited(error):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code >= 500
+    return bool(TRANSIENT_ERRORS & {cls.__name__ for cls in type(error).__mro__})
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 10.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float) -> None:
+        # The provider said stop: spend the burst too, so the first request after the pause isn't followed by a stampede.
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def refund(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    async def acquire(self, deadline: float) -> None:
+        """Take a token, failing at once if none will be available before `deadline` (a time.monotonic() value)."""
+        while True:
+            wait = self.wait_time()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            if time.monotonic() + wait > deadline:
+                raise LLMBusyError("rate limit")
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on requests in flight for one model.
+
+    Each success below the latency tolerance raises the limit by 1/limit; a 429
+    halves it and slow responses (against the best latency seen lately) trim it.
+    """
+
+    def __init__(self, initial: float = LLM_INITIAL_CONCURRENCY, maximum: int = LLM_MAX_CONCURRENCY, tolerance: float = LLM_LATENCY_TOLERANCE):
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.limit = min(float(initial), float(maximum))
+        self.inflight = 0
+        self.waiting = 0
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, deadline: float) -> None:
+        async with self.condition:
+            self.waiting += 1
+            try:
+                remaining = deadline - time.monotonic()
+                await asyncio.wait_for(self.condition.wait_for(lambda: self.inflight < int(self.limit)), timeout=max(remaining, 0))
+            except asyncio.TimeoutError:
+                raise LLMBusyError("concurrency limit")
+            finally:
+                self.waiting -= 1
+            self.inflight += 1
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.inflight -= 1
+            self.condition.notify(max(1, int(self.limit) - self.inflight))
+
+    def record_success(self, latency: float) -> None:
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        # The baseline drifts up slowly so one lucky response doesn't pin it forever.
+        self.best_latency = latency if self.best_latency is None else min(latency, self.best_latency * 1.01)
+        if self.latency > self.tolerance * self.best_latency:
+            self.limit = max(1.0, self.limit * 0.9)
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+    def record_throttle(self) -> None:
+        self.limit = max(1.0, self.limit / 2)
+
+
+class ModelLimiter:
+    def __init__(self, provider_bucket: TokenBucket, bucket: TokenBucket, concurrency: AdaptiveConcurrency):
+        self.provider_bucket = provider_bucket
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.succeeded = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, call: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        # Slot first, tokens second: a request turned away at the queue must not spend rate budget,
+        # least of all the provider's, which the same-provider fallback model needs.
+        try:
+            await self.concurrency.acquire(deadline)
+            try:
+                await self.bucket.acquire(deadline)
+            except BaseException:
+                await self.concurrency.release()
+                raise
+            try:
+                await self.provider_bucket.acquire(deadline)
+            except BaseException:
+                self.bucket.refund()
+                await self.concurrency.release()
+                raise
+        except LLMBusyError:
+            self.rejected += 1
+            raise
+
+        started = time.monotonic()
+        try:
+            result = await call()
+        except Exception as e:
+            if is_rate_limited(e):
+                self.rate_limited += 1
+                self.concurrency.record_throttle()
+                self.bucket.pause(retry_after(e) or LLM_RATE_LIMIT_PAUSE)
+            else:
+                self.failed += 1
+            raise
+        finally:
+            await self.concurrency.release()
+        self.succeeded += 1
+        self.concurrency.record_success(time.monotonic() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "succeeded": self.succeeded,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "inflight": self.concurrency.inflight,
+            "waiting": self.concurrency.waiting,
+            "latency_ms": round(self.concurrency.latency * 1000) if self.concurrency.latency is not None else None,
+            "requests_per_minute": round(self.bucket.rate * 60, 1),
+        }
+
+
+class LLMLimiter:
+    """Token buckets per provider and per model, and an adaptive concurrency limit per model."""
+
+    def __init__(self):
+        self._providers: Dict[str, TokenBucket] = {}
+        self._models: Dict[Tuple[str, str], ModelLimiter] = {}
+        self.failovers = 0
+
+    def model(self, provider: str, model: str) -> ModelLimiter:
+        key = (provider, model)
+        if key not in self._models:
+            if provider not in self._providers:
+                self._providers[provider] = TokenBucket(rate_limit(provider))
+            self._models[key] = ModelLimiter(self._providers[provider], TokenBucket(rate_limit(provider, model)), AdaptiveConcurrency())
+        return self._models[key]
+
+    async def run(self, provider: str, model: str, call: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        return await self.model(provider, model).run(call, deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "failovers": self.failovers,
+            "models": {f"{provider}/{model}": limiter.stats() for (provider, model), limiter in self._models.items()},
+        }
+
+
+llm_limiter = LLMLimiter()
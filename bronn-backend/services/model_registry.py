@@ -0,0 +1,78 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+import joblib
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("BRONN_MODEL_DIR", "./models")
+MODEL_CACHE_SIZE = int(os.getenv("BRONN_MODEL_CACHE_SIZE", "16"))
+
+
+class ModelRegistry:
+    def __init__(self, model_dir: str = MODEL_DIR, max_models: int = MODEL_CACHE_SIZE):
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self._models: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict = {}
+
+    def model_path(self, ticker: str) -> str:
+        return os.path.join(self.model_dir, f"{ticker}_model.pkl")
+
+    def fingerprint(self, ticker: str) -> str:
+        stat = os.stat(self.model_path(ticker))
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def get(self, ticker: str) -> Any:
+        path = self.model_path(ticker)
+        mtime = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            entry = self._models.get(ticker)
+            if entry and entry[0] == mtime:
+                self._models.move_to_end(ticker)
+                return entry[1]
+            load_lock = self._load_locks.setdefault(ticker, threading.Lock())
+
+        # One loader per ticker; other callers wait for it instead of loading the same pickle.
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(ticker)
+                if entry and entry[0] == mtime:
+                    self._models.move_to_end(ticker)
+                    return entry[1]
+
+            logger.info(f"Loading model for {ticker} from {path}")
+            model = joblib.load(path)
+
+            with self._lock:
+                self._models[ticker] = (mtime, model)
+                self._models.move_to_end(ticker)
+                while len(self._models) > self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    logger.info(f"Evicted model for {evicted}")
+            return model
+
+    def prewarm(self, tickers: Iterable[str]) -> None:
+        for ticker in tickers:
+            try:
+                self.get(ticker)
+            except Exception as e:
+                logger.error(f"Error prewarming model for {ticker}: {str(e)}")
+
+    def evict(self, ticker: Optional[str] = None) -> None:
+        with self._lock:
+            if ticker is None:
+                self._models.clear()
+            else:
+                self._models.pop(ticker, None)
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,124 @@
+import logging
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from bs4 import BeautifulSoup
+from data_models import Article, News, NewsResponse
+from services.compaction import WORD, query_terms
+from services.entity_extractor import find_tickers
+from services.html_text import etree
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NEWS_RESULTS_LIMIT = 3
+TIME_PATTERN = re.compile(
+    r"\b(\d+\s+(?:sec|secs|second|seconds|min|mins|minute|minutes|hour|hours|day|days|week|weeks|month|months|year|years)\s+ago"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+\d{1,2},\s+\d{4}"
+    r"|\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+\d{4}"
+    r"|yesterday)\b",
+    re.IGNORECASE,
+)
+GOOGLE_HOSTS = re.compile(r"(^|\.)(google\.[a-z.]+|gstatic\.com|googleusercontent\.com|youtube\.com|blogger\.com)$")
+
+
+def _article_url(href: Optional[str]) -> Optional[str]:
+    if not href:
+        return None
+    if href.startswith("/url?"):
+        href = parse_qs(urlsplit(href).query).get("q", [""])[0]
+    parts = urlsplit(href)
+    if parts.scheme not in ("http", "https") or not parts.netloc or GOOGLE_HOSTS.search(parts.netloc.lower()):
+        return None
+    return href
+
+
+def _domain(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _card(anchor, url: str):
+    """Widest ancestor of the anchor that still links to a single article."""
+    card = anchor
+    for parent in anchor.parents:
+        if parent.name in ("body", "html", "[document]"):
+            break
+        urls = {_article_url(a.get("href")) for a in parent.find_all("a", href=True)} - {None}
+        if urls != {url}:
+            break
+        card = parent
+    return card
+
+
+def _title(anchor, card) -> str:
+    for node in (anchor, card):
+        heading = node.find(attrs={"role": "heading"}) or node.find(["h3", "h4"])
+        if heading and heading.get_text(strip=True):
+            return heading.get_text(" ", strip=True)
+    texts = [text.strip() for text in anchor.stripped_strings]
+    texts = [text for text in texts if not TIME_PATTERN.fullmatch(text)]
+    return max(texts, key=len, default="")
+
+
+class NewsParserStats:
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+news_parser_stats = NewsParserStats()
+
+
+def parse_news_results(html_content: str, query: str, limit: int = NEWS_RESULTS_LIMIT) -> List[Article]:
+    """Article records from a Google News results page, in result order, about the query's stock.
+
+    Cards are found structurally (an outbound link and the widest element around it
+    that links nowhere else) rather than by class names, which Google rotates.
+    """
+    soup = BeautifulSoup(html_content, "lxml" if etree is not None else "html.parser")
+    tickers = set(find_tickers(query))
+    terms = query_terms(query)
+    articles, seen = [], set()
+    for anchor in soup.find_all("a", href=True):
+        url = _article_url(anchor["href"])
+        if url is None or url in seen:
+            continue
+        seen.add(url)
+        card = _card(anchor, url)
+        title = _title(anchor, card)
+        if len(title.split()) < 3:
+            continue
+        card_text = card.get_text(" ", strip=True)
+        # Same bar as the LLM prompt: only articles that are about the stock.
+        if tickers:
+            if not tickers & set(find_tickers(f"{title} {card_text}")):
+                continue
+        elif terms and not terms & set(WORD.findall(f"{title} {card_text}".lower())):
+            continue
+        time_match = TIME_PATTERN.search(card_text)
+        try:
+            articles.append(Article(
+                title=title,
+                source=_domain(url),
+                time_uploaded=time_match.group(0) if time_match else "",
+                link=url,
+            ))
+        except Exception as e:
+            logger.info(f"Skipping news card {url}: {str(e)}")
+            continue
+        if len(articles) == limit:
+            break
+    return articles
+
+
+def build_news_response(articles: List[Article], query: str) -> NewsResponse:
+    sources = ", ".join(dict.fromkeys(article.source for article in articles))
+    return NewsResponse(news=News(
+        intro=f"Here are the {len(articles)} latest news articles for \"{query}\", from {sources}.",
+        articles=articles,
+        conclusion="Each article is summarized below with its likely effect on the stock. Weigh them together and do your own research before making investment decisions.",
+    ))
@@ -0,0 +1,231 @@
+import logging
+import os
+from typing import List, Optional
+import numpy as np
+from pydantic import BaseModel
+from services.price_index import TRADING_DAYS_PER_YEAR, UNKNOWN_SECTOR, PriceIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_STOCK_WEIGHT = float(os.getenv("BRONN_MAX_STOCK_WEIGHT", "0.3"))
+MAX_SECTOR_WEIGHT = float(os.getenv("BRONN_MAX_SECTOR_WEIGHT", "0.5"))
+RISK_AVERSION = float(os.getenv("BRONN_RISK_AVERSION", "3"))
+ALLOCATION_CANDIDATES = int(os.getenv("BRONN_ALLOCATION_CANDIDATES", "25"))
+MIN_HISTORY_DAYS = 20
+SOLVER_ITERATIONS = 300
+PROJECTION_ITERATIONS = 200
+TOLERANCE = 1e-8
+PROJECTION_TOLERANCE = 1e-12
+FEASIBILITY_TOLERANCE = 1e-6
+
+
+class Holding(BaseModel):
+    ticker: str
+    sector: str
+    shares: int
+    price: float
+    amount: float
+    weight: float
+
+
+class Allocation(BaseModel):
+    budget: float
+    invested: float
+    cash: float
+    expected_return: Optional[float]
+    volatility: Optional[float]
+    holdings: List[Holding]
+
+    def describe(self) -> str:
+        if not self.holdings:
+            return "No allocation: the budget doesn't cover a diversified set of shares within the weight limits."
+        lines = [
+            f"{h.ticker} ({h.sector}): {h.shares} shares at ₹{h.price:,.2f} = ₹{h.amount:,.2f} ({h.weight:.1f}%)"
+            for h in self.holdings
+        ]
+        lines.append(f"Invested ₹{self.invested:,.2f} of ₹{self.budget:,.2f}, cash left ₹{self.cash:,.2f}")
+        lines.append(f"Expected annual return {self.expected_return:.1f}%, annual volatility {self.volatility:.1f}% (from recent price history)")
+        return "\n".join(lines)
+
+
+def annualized_moments(returns: np.ndarray):
+    """Mean vector and covariance matrix of daily log returns, annualized.
+
+    Missing days are treated as zero excess return so every ticker contributes to one
+    matrix product instead of pairwise covariance loops.
+    """
+    mean = np.nanmean(returns, axis=0)
+    centered = np.nan_to_num(returns - mean)
+    counts = np.isfinite(returns).astype(np.float64)
+    pairs = np.maximum(counts.T @ counts - 1, 1)
+    covariance = (centered.T @ centered) / pairs
+    return mean * TRADING_DAYS_PER_YEAR, covariance * TRADING_DAYS_PER_YEAR
+
+
+def _project_capped_simplex(w: np.ndarray, upper: np.ndarray, total: float) -> np.ndarray:
+    """Euclidean projection onto {0 <= w <= upper, sum(w) = total}.
+
+    sum(clip(w - tau, 0, upper)) is piecewise linear in tau with breakpoints at w and
+    w - upper, so evaluating it at every breakpoint and interpolating is exact.
+    """
+    taus = np.sort(np.concatenate([w, w - upper]))
+    totals = np.clip(w[None, :] - taus[:, None], 0, upper).sum(axis=1)
+    if totals[0] <= total:
+        return np.minimum(np.maximum(w - taus[0], 0), upper)
+    k = np.searchsorted(-totals, -total)
+    span = totals[k - 1] - totals[k]
+    tau = taus[k - 1] + (totals[k - 1] - total) * (taus[k] - taus[k - 1]) / span if span > 0 else taus[k]
+    return np.clip(w - tau, 0, upper)
+
+
+def check_feasible(w: np.ndarray, upper: np.ndarray, total: float, sector_ids: np.ndarray, sector_cap: float) -> None:
+    sums = np.bincount(sector_ids, weights=w)
+    if (
+        (w < -FEASIBILITY_TOLERANCE).any()
+        or (w > upper + FEASIBILITY_TOLERANCE).any()
+        or (sums > sector_cap + FEASIBILITY_TOLERANCE).any()
+        or abs(w.sum() - total) > FEASIBILITY_TOLERANCE
+    ):
+        raise ValueError(
+            f"Weights break the allocation limits: max weight {w.max():.4f} (cap {upper.max():.4f}), "
+            f"max sector {sums.max():.4f} (cap {sector_cap:.4f}), total {w.sum():.4f} (target {total:.4f})"
+        )
+
+
+def _project(w: np.ndarray, upper: np.ndarray, total: float, sector_ids: np.ndarray, sector_cap: float) -> np.ndarray:
+    """Euclidean projection onto {0 <= w <= upper, sum(w) = total, every sector sum <= sector_cap}.
+
+    The optimality conditions give w = clip(w - tau - lambda_sector, 0, upper). A sector
+    that the common shift tau alone would leave over the cap sits exactly at the cap
+    (its own capped-simplex projection); the rest take clip(w - tau). The invested total
+    is monotone in tau, so tau is found by bisection to PROJECTION_TOLERANCE.
+    """
+    sectors = sector_ids.max() + 1
+
+    def sector_sums(tau: float) -> np.ndarray:
+        return np.bincount(sector_ids, weights=np.clip(w - tau, 0, upper), minlength=sectors)
+
+    low, high = (w - upper).min() - 1.0, w.max()
+    for _ in range(PROJECTION_ITERATIONS):
+        if high - low < PROJECTION_TOLERANCE:
+            break
+        middle = (low + high) / 2
+        if np.minimum(sector_sums(middle), sector_cap).sum() > total:
+            low = middle
+        else:
+            high = middle
+    x = np.clip(w - high, 0, upper)
+    for sector in np.flatnonzero(sector_sums(high) > sector_cap):
+        members = sector_ids == sector
+        x[members] = _project_capped_simplex(w[members], upper[members], sector_cap)
+    return x
+
+
+def optimize_weights(
+    mean: np.ndarray,
+    covariance: np.ndarray,
+    upper: np.ndarray,
+    sector_ids: np.ndarray,
+    sector_cap: float,
+    risk_aversion: float = RISK_AVERSION,
+) -> np.ndarray:
+    """Maximize mean·w - risk_aversion/2 · wᵀΣw under weight and sector caps with projected gradient ascent."""
+    sector_room = np.minimum(np.bincount(sector_ids, weights=upper), sector_cap).sum()
+    # Stay fully invested when the caps allow it, otherwise invest as much as they permit.
+    total = min(1.0, sector_room)
+
+    step = 1.0 / max(risk_aversion * np.linalg.eigvalsh(covariance)[-1], 1e-6)
+    w = _project(np.full(len(mean), total / len(mean)), upper, total, sector_ids, sector_cap)
+    for _ in range(SOLVER_ITERATIONS):
+        gradient = mean - risk_aversion * covariance @ w
+        w_next = _project(w + step * gradient, upper, total, sector_ids, sector_cap)
+        if np.abs(w_next - w).max() < TOLERANCE:
+            w = w_next
+            break
+        w = w_next
+    check_feasible(w, upper, total, sector_ids, sector_cap)
+    return w
+
+
+def round_to_shares(weights: np.ndarray, prices: np.ndarray, budget: float, stock_cap: float, sector_ids: np.ndarray, sector_cap: float) -> np.ndarray:
+    """Floor target amounts to whole shares, then top up the largest shortfalls while cash and caps allow."""
+    target = weights * budget
+    shares = np.floor(target / prices)
+    for _ in range(len(prices)):
+        amounts = shares * prices
+        cash = budget - amounts.sum()
+        sector_amounts = np.bincount(sector_ids, weights=amounts)
+        fits = (
+            (prices <= cash)
+            & (amounts + prices <= stock_cap * budget)
+            & (sector_amounts[sector_ids] + prices <= sector_cap * budget)
+            & (target > amounts)
+        )
+        if not fits.any():
+            break
+        shortfall = np.where(fits, target - amounts, -np.inf)
+        shares[np.argmax(shortfall)] += 1
+    return shares.astype(int)
+
+
+def allocate(
+    index: PriceIndex,
+    budget: float,
+    max_stock_weight: float = MAX_STOCK_WEIGHT,
+    max_sector_weight: float = MAX_SECTOR_WEIGHT,
+    risk_aversion: float = RISK_AVERSION,
+    candidates: int = ALLOCATION_CANDIDATES,
+) -> Allocation:
+    """Split `budget` into whole shares across the index by a mean-variance objective."""
+    empty = Allocation(budget=budget, invested=0.0, cash=budget, expected_return=None, volatility=None, holdings=[])
+    if budget <= 0 or len(index) == 0 or len(index.returns) < MIN_HISTORY_DAYS:
+        return empty
+
+    # At least one share must fit under the per-stock cap, and there must be enough history.
+    eligible = (index.price <= budget * max_stock_weight) & (np.isfinite(index.returns).sum(axis=0) >= MIN_HISTORY_DAYS)
+    eligible = np.flatnonzero(eligible)
+    if len(eligible) < 2:
+        return empty
+
+    # Narrow a wide universe to the best return per unit of risk before building the dense covariance.
+    if len(eligible) > candidates:
+        returns = index.returns[:, eligible]
+        sharpe = np.nanmean(returns, axis=0) / np.maximum(np.nanstd(returns, axis=0), 1e-12)
+        eligible = eligible[np.argpartition(-sharpe, candidates - 1)[:candidates]]
+    mean, covariance = annualized_moments(index.returns[:, eligible])
+
+    prices = index.price[eligible]
+    # Unmapped tickers each get their own bucket; lumping them together would cap most of a wide universe at one sector's share.
+    sectors = np.where(index.sector[eligible] == UNKNOWN_SECTOR, index.tickers[eligible], index.sector[eligible])
+    _, sector_ids = np.unique(sectors.astype(str), return_inverse=True)
+    upper = np.full(len(eligible), max_stock_weight)
+    weights = optimize_weights(mean, covariance, upper, sector_ids, max_sector_weight, risk_aversion)
+    shares = round_to_shares(weights, prices, budget, max_stock_weight, sector_ids, max_sector_weight)
+
+    held = shares > 0
+    if not held.any():
+        return empty
+    amounts = shares * prices
+    invested = float(amounts.sum())
+    final_weights = amounts / budget
+    holdings = [
+        Holding(
+            ticker=index.tickers[i],
+            sector=index.sector[i],
+            shares=int(n),
+            price=round(float(p), 2),
+            amount=round(float(a), 2),
+            weight=round(float(w) * 100, 2),
+        )
+        for i, n, p, a, w in zip(eligible[held], shares[held], prices[held], amounts[held], final_weights[held])
+    ]
+    holdings.sort(key=lambda h: h.amount, reverse=True)
+    return Allocation(
+        budget=budget,
+        invested=round(invested, 2),
+        cash=round(budget - invested, 2),
+        expected_return=round(float(mean @ final_weights) * 100, 2),
+        volatility=round(float(np.sqrt(final_weights @ covariance @ final_weights)) * 100, 2),
+        holdings=holdings,
+    )
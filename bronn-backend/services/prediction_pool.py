@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREDICTION_WORKERS = int(os.getenv("BRONN_PREDICTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+PREDICTION_QUEUE_DEPTH = int(os.getenv("BRONN_PREDICTION_QUEUE_DEPTH", "32"))
+PREDICTION_TIMEOUT = float(os.getenv("BRONN_PREDICTION_TIMEOUT", "60"))
+
+
+def _init_worker(prewarm_tickers: Tuple[str, ...]) -> None:
+    # Each worker process has its own model registry; warm it before taking jobs.
+    from services.model_registry import model_registry
+    model_registry.prewarm(prewarm_tickers)
+
+
+def _run_predictions(ticker: str, target_dates: List[date]):
+    # HTTPException doesn't survive pickling, so hand back its parts instead.
+    from services.stock_prediction import compute_predictions
+    try:
+        return True, compute_predictions(ticker, target_dates)
+    except HTTPException as e:
+        return False, (e.status_code, e.detail)
+    except Exception as e:
+        return False, (500, f"Error making prediction: {str(e)}")
+
+
+class PredictionPool:
+    def __init__(
+        self,
+        workers: int = PREDICTION_WORKERS,
+        queue_depth: int = PREDICTION_QUEUE_DEPTH,
+        timeout: float = PREDICTION_TIMEOUT,
+    ):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def start(self, prewarm_tickers: Iterable[str] = ()) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(tuple(prewarm_tickers),),
+            )
+            logger.info(f"Started prediction pool with {self.workers} workers")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, ticker: str, target_date: date) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        return (await self.run_batch(ticker, [target_date]))[0]
+
+    async def run_batch(self, ticker: str, target_dates: List[date]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        if self._pending >= self.queue_depth:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail="Prediction service is busy, please retry shortly.")
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, _run_predictions, ticker, list(target_dates))
+        # A worker can't be interrupted, so a job stays pending until it actually finishes, not until we stop waiting.
+        self._pending += 1
+        job.add_done_callback(self._job_done)
+        try:
+            ok, payload = await asyncio.wait_for(asyncio.shield(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(status_code=504, detail=f"Prediction for {ticker} timed out")
+
+        if not ok:
+            status_code, detail = payload
+            raise HTTPException(status_code=status_code, detail=detail)
+        return payload
+
+    def _job_done(self, job: asyncio.Future) -> None:
+        self._pending -= 1
+        if not job.cancelled() and job.exception() is not None:
+            logger.error(f"Prediction job failed: {job.exception()!r}")
+
+    async def prewarm(self, ticker: str) -> None:
+        # Best effort: loads the model in whichever worker picks the job up.
+        if self._pending >= self.queue_depth:
+            return
+        self.start()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _init_worker, (ticker,))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+prediction_pool = PredictionPool()
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_MONTH = 21
+TRADING_DAYS_PER_YEAR = 252
+
+SECTORS: Dict[str, str] = {
+    "HDFCBANK.NS": "Financials", "ICICIBANK.NS": "Financials", "KOTAKBANK.NS": "Financials",
+    "AXISBANK.NS": "Financials", "SBIN.NS": "Financials", "BAJFINANCE.NS": "Financials",
+    "INFY.NS": "IT", "TCS.NS": "IT", "WIPRO.NS": "IT", "HCLTECH.NS": "IT", "TECHM.NS": "IT",
+    "RELIANCE.NS": "Energy", "ONGC.NS": "Energy", "ADANIGREEN.NS": "Utilities",
+    "POWERGRID.NS": "Utilities", "NTPC.NS": "Utilities",
+    "LT.NS": "Industrials", "ULTRACEMCO.NS": "Materials", "GRASIM.NS": "Materials",
+    "JSWSTEEL.NS": "Materials", "ASIANPAINT.NS": "Materials",
+    "SUNPHARMA.NS": "Healthcare", "BHARTIARTL.NS": "Telecom",
+    "HINDUNILVR.NS": "Consumer Staples", "ITC.NS": "Consumer Staples", "NESTLEIND.NS": "Consumer Staples",
+    "DMART.NS": "Consumer Staples", "TITAN.NS": "Consumer Discretionary",
+    "MARUTI.NS": "Consumer Discretionary", "M&M.NS": "Consumer Discretionary",
+}
+
+UNKNOWN_SECTOR = "Unknown"
+SORT_FIELDS = ("price", "return_1mo", "volatility", "market_cap")
+
+
+class PriceIndex:
+    """Column arrays over the ticker universe, kept sorted by price.
+
+    All queries are vectorized over the arrays, so cost grows with the number of
+    matches rather than with Python-level loops over the universe.
+    """
+
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        price: np.ndarray,
+        return_1mo: np.ndarray,
+        volatility: np.ndarray,
+        sector: Sequence[str],
+        market_cap: np.ndarray,
+        returns: Optional[np.ndarray] = None,
+        daily_change: Optional[np.ndarray] = None,
+    ):
+        order = np.argsort(price, kind="stable")
+        self.tickers = np.asarray(tickers, dtype=object)[order]
+        self.price = np.asarray(price, dtype=np.float64)[order]
+        self.return_1mo = np.asarray(return_1mo, dtype=np.float64)[order]
+        self.volatility = np.asarray(volatility, dtype=np.float64)[order]
+        self.sector = np.asarray(sector, dtype=object)[order]
+        self.market_cap = np.asarray(market_cap, dtype=np.float64)[order]
+        # Daily log returns, days x tickers, columns in the same order as the other arrays.
+        self.returns = np.empty((0, len(order))) if returns is None else np.asarray(returns, dtype=np.float64)[:, order]
+        # Change since the previous close, in rupees.
+        self.daily_change = np.full(len(order), np.nan) if daily_change is None else np.asarray(daily_change, dtype=np.float64)[order]
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def empty(cls) -> "PriceIndex":
+        return cls([], np.empty(0), np.empty(0), np.empty(0), [], np.empty(0))
+
+    @classmethod
+    def from_closes(cls, closes: pd.DataFrame, market_caps: Optional[Dict[str, float]] = None) -> "PriceIndex":
+        """Build from a dates x tickers frame of closing prices."""
+        closes = closes.sort_index().dropna(axis=1, how="all")
+        values = closes.ffill().to_numpy(dtype=np.float64)
+        tickers = list(closes.columns)
+        if not tickers:
+            return cls.empty()
+
+        price = values[-1]
+        month_ago = values[max(0, len(values) - 1 - TRADING_DAYS_PER_MONTH)]
+        return_1mo = (price / month_ago - 1) * 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            daily_returns = np.diff(np.log(values), axis=0)
+        daily_change = price - values[-2] if len(values) > 1 else np.full(len(tickers), np.nan)
+        volatility = np.nanstd(daily_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100 if len(values) > 2 else np.full(len(tickers), np.nan)
+        sector = [SECTORS.get(ticker, UNKNOWN_SECTOR) for ticker in tickers]
+        market_caps = market_caps or {}
+        market_cap = np.array([market_caps.get(ticker, np.nan) for ticker in tickers], dtype=np.float64)
+
+        valid = np.isfinite(price)
+        return cls(
+            np.asarray(tickers, dtype=object)[valid], price[valid], return_1mo[valid],
+            volatility[valid], np.asarray(sector, dtype=object)[valid], market_cap[valid],
+            daily_returns[:, valid], daily_change[valid],
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def position(self, ticker: str) -> Optional[int]:
+        return self._positions.get(ticker)
+
+    def pairs(self) -> List[Tuple[float, str]]:
+        return list(zip(self.price.tolist(), self.tickers.tolist()))
+
+    def _mask(self, sector: Optional[str] = None) -> np.ndarray:
+        if sector is None:
+            return np.ones(len(self.price), dtype=bool)
+        return self.sector == sector
+
+    def _select(self, indices: np.ndarray, sort_by: Optional[str], descending: bool) -> np.ndarray:
+        if sort_by is None:
+            return indices
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Can't sort by {sort_by}; choose one of {', '.join(SORT_FIELDS)}")
+        keys = getattr(self, sort_by)[indices]
+        # NaNs sort last either way.
+        keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        return indices[order]
+
+    def nearest(self, target_price: float, k: int = 3, sector: Optional[str] = None) -> np.ndarray:
+        candidates = np.flatnonzero(self._mask(sector))
+        if len(candidates) == 0 or k <= 0:
+            return candidates[:0]
+        distance = np.abs(self.price[candidates] - target_price)
+        k = min(k, len(candidates))
+        nearest = np.argpartition(distance, k - 1)[:k]
+        return candidates[nearest[np.argsort(distance[nearest], kind="stable")]]
+
+    def price_range(self, low: float, high: float, sector: Optional[str] = None, sort_by: Optional[str] = None, descending: bool = False) -> np.ndarray:
+        # Prices are sorted, so the range is a contiguous slice.
+        start = np.searchsorted(self.price, low, side="left")
+        end = np.searchsorted(self.price, high, side="right")
+        indices = np.arange(start, end)
+        indices = indices[self._mask(sector)[indices]]
+        return self._select(indices, sort_by, descending)
+
+    def affordable(self, budget: float, shares: int = 1, sector: Optional[str] = None, sort_by: Optional[str] = None, descending: bool = False) -> np.ndarray:
+        return self.price_range(0.0, budget / max(shares, 1), sector=sector, sort_by=sort_by, descending=descending)
+
+    def records(self, indices: np.ndarray) -> List[Dict[str, object]]:
+        return [
+            {
+                "ticker": self.tickers[i],
+                "price": float(self.price[i]),
+                "return_1mo": float(self.return_1mo[i]),
+                "volatility": float(self.volatility[i]),
+                "sector": self.sector[i],
+                "market_cap": None if np.isnan(self.market_cap[i]) else float(self.market_cap[i]),
+            }
+            for i in indices
+        ]
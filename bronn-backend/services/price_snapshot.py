@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+from services.content_cache import content_cache
+from services.price_index import PriceIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRICE_SOURCE = os.getenv("BRONN_PRICE_SOURCE", "yfinance")
+PRICE_REFRESH_SECONDS = float(os.getenv("BRONN_PRICE_REFRESH_SECONDS", "300"))
+HISTORY_DAYS = 64
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def market_is_open(now: Optional[datetime] = None) -> bool:
+    now = (now or datetime.now(IST)).astimezone(IST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+class YFinanceSource:
+    """Three months of daily closes for every ticker from one batched yfinance download."""
+
+    def fetch_closes(self, tickers: List[str]) -> pd.DataFrame:
+        import yfinance as yf
+
+        data = yf.download(tickers, period="3mo", group_by="ticker", threads=True, progress=False, auto_adjust=False)
+        if not isinstance(data.columns, pd.MultiIndex):
+            return data[["Close"]].rename(columns={"Close": tickers[0]})
+        return data.xs("Close", axis=1, level=1)
+
+
+class CsvSource:
+    """Recent closes from the local price history (or any PriceStore CSV), for offline runs."""
+
+    def __init__(self, store=None):
+        from services.price_store import price_store
+
+        self.store = store or price_store
+
+    def fetch_closes(self, tickers: List[str]) -> pd.DataFrame:
+        columns = {}
+        for ticker in tickers:
+            try:
+                dates = self.store.dates(ticker)[-HISTORY_DAYS:]
+                columns[ticker] = pd.Series(self.store.column(ticker, "Close")[-HISTORY_DAYS:], index=dates)
+            except KeyError:
+                logger.error(f"No local price for {ticker}")
+        return pd.DataFrame(columns)
+
+
+PRICE_SOURCES = {"yfinance": YFinanceSource, "csv": CsvSource}
+
+
+class Snapshot(NamedTuple):
+    index: PriceIndex
+    prices: List[Tuple[float, str]]
+    taken_at: float
+
+
+class PriceSnapshot:
+    def __init__(self, tickers: List[str], source=None, refresh_seconds: float = PRICE_REFRESH_SECONDS):
+        self.tickers = tickers
+        self.source = source or PRICE_SOURCES[PRICE_SOURCE]()
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = Snapshot(PriceIndex.empty(), [], 0.0)
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    @property
+    def prices(self) -> List[Tuple[float, str]]:
+        return self._snapshot.prices
+
+    @property
+    def index(self) -> PriceIndex:
+        return self._snapshot.index
+
+    def age(self) -> Optional[float]:
+        return time.time() - self._snapshot.taken_at if self._snapshot.taken_at else None
+
+    def refresh(self) -> None:
+        closes = self.source.fetch_closes(self.tickers)
+        index = PriceIndex.from_closes(closes, self.market_caps())
+        if not len(index):
+            logger.error("Price refresh returned no prices; keeping previous snapshot")
+            return
+        # Readers hold a reference to the old snapshot; swapping the whole tuple keeps it consistent.
+        self._snapshot = Snapshot(index, index.pairs(), time.time())
+        logger.info(f"Loaded prices for {len(index)} tickers")
+
+    def market_caps(self) -> Dict[str, float]:
+        # Market caps come from the metadata cache filled during suggestion enrichment.
+        caps = {}
+        for ticker in self.tickers:
+            metadata = content_cache.get(f"meta:{ticker}")
+            if metadata and metadata.get("market_cap"):
+                caps[ticker] = metadata["market_cap"]
+        return caps
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Error refreshing prices: {str(e)}")
+            self._ready.set()
+            await asyncio.sleep(self.refresh_seconds)
+            while not market_is_open():
+                await asyncio.sleep(min(self.refresh_seconds, 60))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        age = self.age()
+        return {
+            "tickers": len(self._snapshot.prices),
+            "age_seconds": round(age, 1) if age is not None else None,
+            "market_open": market_is_open(),
+            "source": type(self.source).__name__,
+        }
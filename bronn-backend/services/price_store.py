@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRICE_DATA_PATH = os.getenv("BRONN_PRICE_DATA", "top_10_indian_stocks_data.csv")
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+class PriceStore:
+    """Per-ticker price history parsed once from the combined CSV.
+
+    Rows are sorted by (Ticker, Date) into contiguous column arrays, so each
+    ticker's history is a pair of offsets and every slice is a view.
+    """
+
+    def __init__(self, path: str = PRICE_DATA_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._columns: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+
+    def _load(self) -> None:
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            logger.info(f"Loading price history from {self.path}")
+            data = pd.read_csv(self.path, parse_dates=["Date"])
+            data = data.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+
+            tickers = data["Ticker"].to_numpy()
+            boundaries = np.flatnonzero(tickers[1:] != tickers[:-1]) + 1
+            starts = np.concatenate(([0], boundaries)) if len(tickers) else np.empty(0, dtype=int)
+            ends = np.concatenate((boundaries, [len(tickers)])) if len(tickers) else np.empty(0, dtype=int)
+
+            self._dates = data["Date"].to_numpy(dtype="datetime64[ns]")
+            self._columns = {
+                column: data[column].to_numpy(dtype=np.float64)
+                for column in PRICE_COLUMNS if column in data.columns
+            }
+            self._offsets = {tickers[start]: (int(start), int(end)) for start, end in zip(starts, ends)}
+            self._mtime = mtime
+
+    @property
+    def tickers(self) -> List[str]:
+        self._load()
+        return list(self._offsets)
+
+    def dates(self, ticker: str) -> np.ndarray:
+        self._load()
+        start, end = self._offsets[ticker]
+        return self._dates[start:end]
+
+    def column(self, ticker: str, column: str = "Close") -> np.ndarray:
+        self._load()
+        start, end = self._offsets[ticker]
+        return self._columns[column][start:end]
+
+    def history(self, ticker: str) -> pd.DataFrame:
+        """Return the ticker's history in the `ds`/`y` shape NeuralProphet expects."""
+        self._load()
+        if ticker not in self._offsets:
+            raise KeyError(f"No price history for {ticker}")
+        return pd.DataFrame({"ds": self.dates(ticker), "y": self.column(ticker, "Close")}, copy=False)
+
+    def frame(self) -> pd.DataFrame:
+        """All rows as one long Date/Ticker/OHLCV frame, sorted by ticker then date."""
+        self._load()
+        tickers = np.empty(len(self._dates), dtype=object)
+        for ticker, (start, end) in self._offsets.items():
+            tickers[start:end] = ticker
+        return pd.DataFrame({"Date": self._dates, "Ticker": tickers, **self._columns}, copy=False)
+
+    def ticker_fingerprint(self, ticker: str) -> str:
+        # Changes whenever a bar is appended or the latest close is revised.
+        dates = self.dates(ticker)
+        closes = self.column(ticker, "Close")
+        return f"{len(dates)}-{dates[-1]}-{closes[-1]!r}" if len(dates) else "0"
+
+    def fingerprint(self) -> str:
+        stat = os.stat(self.path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+price_store = PriceStore()
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """LRU cache with a per-entry TTL where concurrent misses for one key share a single computation."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self._async_inflight: Dict[Hashable, asyncio.Future] = {}
+        self._async_waiters: Dict[asyncio.Future, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[1]
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+            # Another caller is computing this key; wait and re-check. If it failed we compute ourselves.
+            event.wait()
+
+        try:
+            value = compute()
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Single-flight: the first caller starts `compute` in its own task and every caller awaits that task.
+
+        A caller that gives up (e.g. its client disconnected) doesn't cancel the work for the
+        others; it is only cancelled once nobody is waiting for it.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            task = self._async_inflight.get(key)
+            if task is not None and not task.cancelled():
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                task = asyncio.ensure_future(self._acompute(key, compute))
+                self._async_inflight[key] = task
+                self._async_waiters[task] = 0
+                task.add_done_callback(lambda done: self._forget(key, done))
+            self._async_waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                self._async_waiters[task] -= 1
+                abandoned = self._async_waiters[task] == 0
+                if abandoned:
+                    del self._async_waiters[task]
+            if abandoned and not task.done():
+                task.cancel()
+
+    async def _acompute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        self._store(key, value)
+        return value
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._async_inflight.get(key) is task:
+                del self._async_inflight[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+        }
+
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Awaitable, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_EXECUTION = os.getenv("BRONN_SPECULATIVE", "false").lower() == "true"
+
+
+class SpeculationMetrics:
+    def __init__(self):
+        self.started: Counter = Counter()
+        self.used: Counter = Counter()
+        self.wasted: Counter = Counter()
+        self.wasted_seconds = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": SPECULATIVE_EXECUTION,
+            "started": dict(self.started),
+            "used": dict(self.used),
+            "wasted": dict(self.wasted),
+            "wasted_seconds": round(self.wasted_seconds, 3),
+        }
+
+
+speculation_metrics = SpeculationMetrics()
+
+
+class Speculation:
+    """Branches started alongside routing; whatever the chosen route doesn't take is cancelled."""
+
+    def __init__(self, metrics: SpeculationMetrics = speculation_metrics):
+        self.metrics = metrics
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started_at: Dict[str, float] = {}
+
+    def start(self, name: str, work: Awaitable[Any]) -> None:
+        self._tasks[name] = asyncio.ensure_future(work)
+        self._started_at[name] = time.monotonic()
+        self.metrics.started[name] += 1
+
+    async def take(self, name: str) -> Optional[Any]:
+        """Return the branch result, or None if it wasn't started or failed."""
+        task = self._tasks.pop(name, None)
+        if task is None:
+            return None
+        self._started_at.pop(name, None)
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Speculative branch {name} failed, recomputing: {str(e)}")
+            self.metrics.wasted[name] += 1
+            return None
+        self.metrics.used[name] += 1
+        return result
+
+    def keep(self, name: str) -> None:
+        """Count a fire-and-forget branch (e.g. a prewarm) as used without waiting for it."""
+        task = self._tasks.pop(name, None)
+        if task is not None:
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._started_at.pop(name, None)
+            self.metrics.used[name] += 1
+
+    def discard(self) -> None:
+        now = time.monotonic()
+        for name, task in self._tasks.items():
+            if task.done() and not task.cancelled():
+                # Consume the outcome so failed branches don't log "exception was never retrieved".
+                task.exception()
+            else:
+                task.cancel()
+            self.metrics.wasted[name] += 1
+            self.metrics.wasted_seconds += now - self._started_at.get(name, now)
+        self._tasks.clear()
+        self._started_at.clear()
@@ -1,106 +1,196 @@
+import asyncio
+import logging
 from datetime import date
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 from fastapi import HTTPException
-import joblib
+import numpy as np
 import pandas as pd
+from services.model_registry import model_registry
+from services.price_store import price_store
+from services.forecast_cache import forecast_cache
+from services.prediction_pool import prediction_pool
+from services.forecast_table import forecast_table
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
+MODEL_START_DATE = date(2024, 7, 1)
+
+def reduced_indices(length: int, num_points: int = 10) -> List[int]:
+    if length <= num_points:
+        return list(range(length))
+    indices = [0, length - 1]
+
+    step = length // (num_points - 1)
+    indices.extend(range(step, length - 1, step))
+
+    return sorted(set(indices))
 
 def reduce_data_points(forecast, num_points=10):
-    if len(forecast) <= num_points:
-        return forecast
-    reduced_indices = [0, len(forecast) - 1]
-    
-    step = len(forecast) // (num_points - 1)
-    reduced_indices.extend(range(step, len(forecast) - 1, step))
-    
-    reduced_indices = sorted(set(reduced_indices))
-    
-    return forecast.iloc[reduced_indices]
+    return forecast.iloc[reduced_indices(len(forecast), num_points)]
+
+def forecast_key(ticker: str, target_date: date):
+    try:
+        return (ticker, target_date.isoformat(), model_registry.fingerprint(ticker), price_store.fingerprint())
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
+
+def table_prediction(ticker: str, target_date: date):
+    try:
+        return forecast_table.lookup(ticker, target_date)
+    except Exception as e:
+        logger.error(f"Error reading forecast table for {ticker}: {str(e)}")
+        return None
 
 def make_prediction(ticker: str, target_date: date) -> Dict[str, Any]:
+    precomputed = table_prediction(ticker, target_date)
+    if precomputed is not None:
+        return precomputed
+    return forecast_cache.get_or_compute(forecast_key(ticker, target_date), lambda: compute_prediction(ticker, target_date))
+
+async def make_prediction_async(ticker: str, target_date: date) -> Dict[str, Any]:
+    # The lookup may read the manifest, a .npz table and (when it changed) the whole price CSV.
+    precomputed = await asyncio.to_thread(table_prediction, ticker, target_date)
+    if precomputed is not None:
+        return precomputed
+    return await forecast_cache.aget_or_compute(forecast_key(ticker, target_date), lambda: prediction_pool.run(ticker, target_date))
+
+async def make_predictions_async(requests: List[Tuple[str, date]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    precomputed = {}
+    by_ticker: Dict[str, List[date]] = {}
+    tabled = await asyncio.to_thread(lambda: [table_prediction(ticker, target_date) for ticker, target_date in requests])
+    for (ticker, target_date), result in zip(requests, tabled):
+        if result is not None:
+            precomputed[(ticker, target_date)] = result
+            continue
+        dates = by_ticker.setdefault(ticker, [])
+        if target_date not in dates:
+            dates.append(target_date)
+
+    async def run_ticker(ticker: str, dates: List[date]):
+        batch = []
+
+        async def pick(index: int):
+            # The pool job is started by the first cache miss and shared by the rest.
+            if not batch:
+                batch.append(asyncio.ensure_future(prediction_pool.run_batch(ticker, dates)))
+            return (await asyncio.shield(batch[0]))[index]
+
+        results = await asyncio.gather(*[
+            forecast_cache.aget_or_compute(forecast_key(ticker, target_date), lambda i=i: pick(i))
+            for i, target_date in enumerate(dates)
+        ])
+        return dict(zip(dates, results))
+
+    per_ticker = await asyncio.gather(*[run_ticker(ticker, dates) for ticker, dates in by_ticker.items()])
+    for ticker, results in zip(by_ticker, per_ticker):
+        for target_date, result in results.items():
+            precomputed[(ticker, target_date)] = result
+    return [precomputed[(ticker, target_date)] for ticker, target_date in requests]
+
+def prediction_days(target_dates: List[date]) -> np.ndarray:
+    # Inclusive day count from the model start date, computed for all targets at once.
+    targets = np.array(target_dates, dtype="datetime64[D]")
+    days = (targets - np.datetime64(MODEL_START_DATE, "D")).astype(np.int64) + 1
+    return np.maximum(days, 0)
+
+def forecast_frame(ticker: str, periods: int) -> pd.DataFrame:
+    model = model_registry.get(ticker)
+    stock_data = price_store.history(ticker)
+
+    future = model.make_future_dataframe(stock_data, periods=periods)
+    future = future[['ds','y']]
+
+    forecast = model.predict(future)
+    forecast['ds'] = pd.to_datetime(forecast['ds'])
+    return forecast
+
+def compute_prediction(ticker: str, target_date: date) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return compute_predictions(ticker, [target_date])[0]
+
+def compute_predictions(ticker: str, target_dates: List[date]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
     try:
-        model = joblib.load(f'./models/{ticker}_model.pkl')
-        
-        combined_data = pd.read_csv('top_10_indian_stocks_data.csv')
-        
-        stock_data = combined_data[combined_data['Ticker'] == ticker]
-        stock_data = stock_data[['Date', 'Close']].rename(columns={'Date': 'ds', 'Close': 'y'})
-        
-        model_start_date = date(2024, 7, 1)
-        
-        business_days = len(pd.date_range(start=model_start_date, end=target_date)) 
-        
-        future = model.make_future_dataframe(stock_data, periods=business_days + 2)
-        future = future[['ds','y']]
-        
-        forecast = model.predict(future)
-        forecast['ds'] = pd.to_datetime(forecast['ds'])
-
-        all_time_high = forecast['yhat1'].max()
-        all_time_low = forecast['yhat1'].min()
-        avg_price = forecast['yhat1'].mean()
-        std_dev = forecast['yhat1'].std()
-        
-        volatility = (std_dev / avg_price) * 100
-  
-        ath_date = forecast.loc[forecast['yhat1'].idxmax(), 'ds'].strftime('%Y-%m-%d')
-        atl_date = forecast.loc[forecast['yhat1'].idxmin(), 'ds'].strftime('%Y-%m-%d')
-
-
-        ma30_window = min(30, business_days)
-        ma90_window = min(90, business_days)
-        forecast['MA30'] = forecast['yhat1'].rolling(window=ma30_window, min_periods=1).mean()
-        forecast['MA90'] = forecast['yhat1'].rolling(window=ma90_window, min_periods=1).mean()
-
-        trend_window = min(30, business_days)
-        last_n_days = forecast['yhat1'].tail(trend_window)
-        trend = 'Upward' if last_n_days.iloc[-1] > last_n_days.iloc[0] else 'Downward'
-
-        forecast['ds'] = forecast['ds'].dt.strftime('%Y-%m-%d')
-        reduced_forecast = reduce_data_points(forecast)
-        
-        full_result = {
-            "prediction": {
-                "x": forecast['ds'].tolist(),
-                "y": forecast['yhat1'].tolist()
-            },
-            "trend": {
-                "x": forecast['ds'].tolist(),
-                "y": forecast['trend'].tolist()
-            }
+        days = prediction_days(target_dates)
+        # One forecast out to the furthest target; nearer targets are prefixes of it.
+        longest = int(days.max())
+        forecast = forecast_frame(ticker, longest + 2)
+        return [summarize_forecast(forecast.iloc[:len(forecast) - (longest - int(n))].copy(), int(n)) for n in days]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
+
+def summarize_forecast(forecast: pd.DataFrame, business_days: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return summarize_arrays(
+        forecast['ds'].to_numpy(dtype="datetime64[D]"),
+        forecast['yhat1'].to_numpy(dtype=np.float64),
+        forecast['trend'].to_numpy(dtype=np.float64),
+        business_days,
+    )
+
+def summarize_arrays(ds: np.ndarray, yhat: np.ndarray, trend_values: np.ndarray, business_days: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    dates = np.datetime_as_string(ds, unit='D').tolist()
+
+    all_time_high = yhat.max()
+    all_time_low = yhat.min()
+    avg_price = yhat.mean()
+    std_dev = yhat.std(ddof=1)
+
+    volatility = (std_dev / avg_price) * 100
+
+    ath_date = dates[int(yhat.argmax())]
+    atl_date = dates[int(yhat.argmin())]
+
+    # Only the final value of each rolling mean is reported, i.e. the mean of the trailing window.
+    ma30_window = min(30, business_days)
+    ma90_window = min(90, business_days)
+    ma30_end = yhat[-ma30_window:].mean()
+    ma90_end = yhat[-ma90_window:].mean()
+
+    trend_window = min(30, business_days)
+    last_n_days = yhat[-trend_window:]
+    trend = 'Upward' if last_n_days[-1] > last_n_days[0] else 'Downward'
+
+    reduced = reduced_indices(len(yhat))
+    reduced_dates = [dates[i] for i in reduced]
+
+    full_result = {
+        "prediction": {
+            "x": dates,
+            "y": yhat.tolist()
+        },
+        "trend": {
+            "x": dates,
+            "y": trend_values.tolist()
         }
-        
-        reduce_result = {
-            "prediction": {
-                "x": reduced_forecast['ds'].tolist(),
-                "y": reduced_forecast['yhat1'].tolist()
-            },
-            "trend": {
-                "x": reduced_forecast['ds'].tolist(),
-                "y": reduced_forecast['trend'].tolist()
-            },
-            "summary": {
-                "start_date": forecast['ds'].iloc[0],
-                "end_date": forecast['ds'].iloc[-1],
-                "prediction_days": business_days,
-                "start_value": round(forecast['yhat1'].iloc[0], 2),
-                "end_value": round(forecast['yhat1'].iloc[-1], 2),
-                "overall_change": round(forecast['yhat1'].iloc[-1] - forecast['yhat1'].iloc[0], 2),
-                "overall_change_percent": round((forecast['yhat1'].iloc[-1] / forecast['yhat1'].iloc[0] - 1) * 100, 2),
-                "all_time_high": round(all_time_high, 2),
-                "all_time_high_date": ath_date,
-                "all_time_low": round(all_time_low, 2),
-                "all_time_low_date": atl_date,
-                "average_price": round(avg_price, 2),
-                "standard_deviation": round(std_dev, 2),
-                "volatility_percent": round(volatility, 2),
-                f"last_{trend_window}_day_trend": trend,
-                f"ma{ma30_window}_end": round(forecast['MA30'].iloc[-1], 2),
-                f"ma{ma90_window}_end": round(forecast['MA90'].iloc[-1], 2)
-            }
+    }
+
+    reduce_result = {
+        "prediction": {
+            "x": reduced_dates,
+            "y": yhat[reduced].tolist()
+        },
+        "trend": {
+            "x": reduced_dates,
+            "y": trend_values[reduced].tolist()
+        },
+        "summary": {
+            "start_date": dates[0],
+            "end_date": dates[-1],
+            "prediction_days": business_days,
+            "start_value": round(float(yhat[0]), 2),
+            "end_value": round(float(yhat[-1]), 2),
+            "overall_change": round(float(yhat[-1] - yhat[0]), 2),
+            "overall_change_percent": round(float((yhat[-1] / yhat[0] - 1) * 100), 2),
+            "all_time_high": round(float(all_time_high), 2),
+            "all_time_high_date": ath_date,
+            "all_time_low": round(float(all_time_low), 2),
+            "all_time_low_date": atl_date,
+            "average_price": round(float(avg_price), 2),
+            "standard_deviation": round(float(std_dev), 2),
+            "volatility_percent": round(float(volatility), 2),
+            f"last_{trend_window}_day_trend": trend,
+            f"ma{ma30_window}_end": round(float(ma30_end), 2),
+            f"ma{ma90_window}_end": round(float(ma90_end), 2)
         }
-        
-        return full_result, reduce_result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
\ No newline at end of file
+    }
+
+    return full_result, reduce_result
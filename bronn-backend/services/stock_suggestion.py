@@ -1,9 +1,21 @@
-from typing import List, Optional
+import asyncio
+import logging
+import math
+import os
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 import yfinance as yf
-from collections import deque
-import bisect
-from helper import get_logo_url
+from helper import aget_logo_url
+from services.content_cache import content_cache
+from services.portfolio import Allocation, allocate
+from services.price_index import PriceIndex
+from services.price_snapshot import PriceSnapshot
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_TIMEOUT = float(os.getenv("BRONN_ENRICHMENT_TIMEOUT", "8"))
+METADATA_TTL = float(os.getenv("BRONN_METADATA_TTL", str(30 * 24 * 3600)))
 
 class StockSuggestion(BaseModel):
     ticker: str
@@ -15,62 +27,103 @@ class StockSuggestion(BaseModel):
     logo_url: Optional[str]
 
 class StockSuggester:
-    def __init__(self, tickers: List[str]):
+    def __init__(self, tickers: List[str], snapshot: Optional[PriceSnapshot] = None):
         self.tickers = tickers
-        self.stock_prices = self.load_stock_prices()
-    
-    def load_stock_prices(self):
-        stock_prices = []
-        for ticker in self.tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                price = stock.history(period="1d")['Close'].iloc[-1]
-                stock_prices.append((price, ticker))
-            except Exception as e:
-                print(f"Error loading {ticker}: {str(e)}")
-        return sorted(stock_prices)
-    
-    def suggest_stocks(self, user_price: float, num_suggestions: int = 3):
-        suggestions = deque(maxlen=num_suggestions)
-        idx = bisect.bisect_left(self.stock_prices, (user_price, ''))
-        left = max(0, idx - num_suggestions)
-        right = min(len(self.stock_prices), idx + num_suggestions)
-        
-        for price, ticker in self.stock_prices[left:right]:
-            price_diff = abs(price - user_price)
-            if len(suggestions) < num_suggestions:
-                suggestions.append((price_diff, ticker, price))
-            elif price_diff < max(suggestions, key=lambda x: x[0])[0]:
-                suggestions.remove(max(suggestions, key=lambda x: x[0]))
-                suggestions.append((price_diff, ticker, price))
-        
-        return [(ticker, price) for _, ticker, price in sorted(suggestions, key=lambda x: x[0])]
+        self.snapshot = snapshot or PriceSnapshot(tickers)
+
+    @property
+    def stock_prices(self):
+        return self.snapshot.prices
     
-    def get_detailed_data(self, suggestions: List[tuple]) -> List[StockSuggestion]:
+    @property
+    def index(self) -> PriceIndex:
+        return self.snapshot.index
+
+    def suggest_stocks(self, user_price: float, num_suggestions: int = 3, sector: Optional[str] = None):
+        index = self.index
+        nearest = index.nearest(user_price, k=num_suggestions, sector=sector)
+        return [(index.tickers[i], float(index.price[i])) for i in nearest]
+
+    def search(
+        self,
+        low: float = 0.0,
+        high: float = float("inf"),
+        budget: Optional[float] = None,
+        shares: int = 1,
+        sector: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, object]]:
+        index = self.index
+        if budget is not None:
+            matches = index.affordable(budget, shares=shares, sector=sector, sort_by=sort_by, descending=descending)
+        else:
+            matches = index.price_range(low, high, sector=sector, sort_by=sort_by, descending=descending)
+        return index.records(matches[:limit])
+
+    def allocate(self, budget: float) -> Allocation:
+        return allocate(self.index, budget)
+
+    async def get_metadata(self, ticker: str) -> Dict[str, Optional[str]]:
+        cache_key = f"meta:{ticker}"
+        cached = await content_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+
+        async def company_info() -> Dict[str, object]:
+            return await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+
+        info, logo_url = await asyncio.gather(
+            asyncio.wait_for(company_info(), timeout=ENRICHMENT_TIMEOUT),
+            asyncio.wait_for(aget_logo_url(ticker), timeout=ENRICHMENT_TIMEOUT),
+            return_exceptions=True,
+        )
+        if isinstance(info, BaseException) or isinstance(logo_url, BaseException):
+            # Don't cache partial metadata; try again on the next request.
+            logger.error(f"Error getting metadata for {ticker}: {info if isinstance(info, BaseException) else logo_url!r}")
+            return {
+                "company_name": ticker if isinstance(info, BaseException) else info.get('longName', ticker),
+                "logo_url": None if isinstance(logo_url, BaseException) else logo_url,
+            }
+        metadata = {
+            "company_name": info.get('longName', ticker),
+            "logo_url": logo_url,
+            "market_cap": info.get('marketCap'),
+            "sector": info.get('sector'),
+        }
+        await content_cache.aset(cache_key, metadata, METADATA_TTL)
+        return metadata
+
+    async def get_detailed_data(self, suggestions: List[tuple]) -> List[StockSuggestion]:
+        if not suggestions:
+            return []
+        tickers = [ticker for ticker, _ in suggestions]
+        # Prices and returns come from the in-memory snapshot; only metadata may need the network, and it is cached.
+        index = self.index
+
+        try:
+            metadata = await asyncio.gather(*[self.get_metadata(ticker) for ticker in tickers])
+        except Exception as e:
+            logger.error(f"Error getting metadata for {tickers}: {e!r}")
+            metadata = [{"company_name": ticker, "logo_url": None} for ticker in tickers]
+
         detailed_suggestions = []
-        for ticker, current_price in suggestions:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="1mo")
-                
-                start_price = hist['Close'].iloc[0]
-                return_1mo = ((current_price - start_price) / start_price) * 100
-                prev_close = hist['Close'].iloc[-2]
-                daily_change = current_price - prev_close
-                daily_change_percent = (daily_change / prev_close) * 100
-                company_name = stock.info.get('longName', ticker)
-                logo_url = get_logo_url(ticker)
+        for (ticker, current_price), meta in zip(suggestions, metadata):
+            i = index.position(ticker)
+            if i is None or not math.isfinite(index.daily_change[i]) or not math.isfinite(index.return_1mo[i]):
+                logger.error(f"Error getting detailed data for {ticker}: no recent history in the price snapshot")
+                continue
+            daily_change = float(index.daily_change[i])
+            prev_close = current_price - daily_change
+            detailed_suggestions.append(StockSuggestion(
+                ticker=ticker,
+                company_name=meta["company_name"],
+                current_price=round(current_price, 2),
+                return_1mo=round(float(index.return_1mo[i]), 2),
+                daily_change=round(daily_change, 2),
+                daily_change_percent=round(daily_change / prev_close * 100, 2),
+                logo_url=meta["logo_url"]
+            ))
 
-                detailed_suggestions.append(StockSuggestion(
-                    ticker=ticker,
-                    company_name=company_name,
-                    current_price=round(current_price, 2),
-                    return_1mo=round(return_1mo, 2),
-                    daily_change=round(daily_change, 2),
-                    daily_change_percent=round(daily_change_percent, 2),
-                    logo_url=logo_url
-                ))
-            except Exception as e:
-                print(f"Error getting detailed data for {ticker}: {str(e)}")
-        
-        return detailed_suggestions
\ No newline at end of file
+        return detailed_suggestions
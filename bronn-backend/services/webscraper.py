@@ -1,7 +1,9 @@
+from typing import Optional
 from fastapi import HTTPException
 from pydantic import HttpUrl
-from bs4 import BeautifulSoup
-from langchain_community.document_loaders import AsyncHtmlLoader
+from services.html_text import extract_text
+from services.content_cache import content_cache
+from services.http_client import AsyncFetcher, fetcher as default_fetcher
 
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -9,8 +11,9 @@ logger = logging.getLogger(__name__)
 
 
 class WebScraper:
-    def __init__(self, url: HttpUrl):
+    def __init__(self, url: HttpUrl, fetcher: AsyncFetcher = default_fetcher):
         self.url = url
+        self.fetcher = fetcher
 
     def __clean_html_content(
         self,
@@ -18,44 +21,31 @@ class WebScraper:
         wanted_tags: list[str],
         unwanted_tags: list[str] = ["script", "style"],
     ) -> str:
-        soup = BeautifulSoup(html_content, "html.parser")
-        for tag in unwanted_tags:
-            for element in soup.find_all(tag):
-                element.decompose()
+        return extract_text(html_content, wanted_tags, unwanted_tags, separator="\n")
 
-        text_parts = []
-        for tag in wanted_tags:
-            elements = soup.find_all(tag)
-            for element in elements:
-                if tag == "a":
-                    href = element.get("href")
-                    text_parts.append(
-                        f"{element.get_text()} ({href})" if href else element.get_text()
-                    )
-                else:
-                    text_parts.append(element.get_text())
-
-        content = " ".join(text_parts)
-        lines = content.split("\n")
-        stripped_lines = [line.strip() for line in lines]
-        non_empty_lines = [line for line in stripped_lines if line]
-        seen = set()
-        deduped_lines = [
-            line for line in non_empty_lines if not (line in seen or seen.add(line))
-        ]
-        cleaned_content = " ".join(deduped_lines)
-
-        return cleaned_content
+    async def fetch_html(self) -> str:
+        try:
+            return await self.fetcher.fetch_text(self.url)
+        except Exception as e:
+            logger.error(f"Scraping Error: {e}")
+            raise HTTPException(status_code=500, detail="Error scraping web content")
 
     async def scraping_with_langchain(
-        self, wanted_tags: list[str] = ["h1", "h2", "h3", "span", "p", "a"]
+        self,
+        wanted_tags: list[str] = ["h1", "h2", "h3", "span", "p", "a"],
+        cache_ttl: Optional[float] = None,
     ) -> str:
+        # Only callers that pass cache_ttl use the content cache; search result pages change too often.
+        cache_key = content_cache.page_text_key(self.url, wanted_tags) if cache_ttl else None
+        if cache_key:
+            cached = await content_cache.aget(cache_key)
+            if cached is not None:
+                return cached
         try:
-            loader = AsyncHtmlLoader([self.url])
-            docs = loader.load()
-            cleaned_content = self.__clean_html_content(
-                docs[0].page_content, wanted_tags
-            )
+            html_content = await self.fetcher.fetch_text(self.url)
+            cleaned_content = self.__clean_html_content(html_content, wanted_tags)
+            if cache_key and cleaned_content:
+                await content_cache.aset(cache_key, cleaned_content, cache_ttl)
             return cleaned_content
         except Exception as e:
             logger.error(f"Scraping Error: {e}")
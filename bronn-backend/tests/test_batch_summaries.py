@@ -0,0 +1,167 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+# agents.py refuses to import without API keys; every chain here is stubbed.
+for name in ("GROQ_API_KEY", "OPENAI_API_KEY"):
+    os.environ[name] = os.getenv(name) or "test"
+
+import agents  # noqa: E402
+import helper  # noqa: E402
+from data_models import ArticleSummarization, BatchSummarization, Summarization  # noqa: E402
+
+ARTICLES = [f"Article text number {i} about Infosys." for i in range(1, 6)]
+
+
+class FakeChain:
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        return self.respond(inputs)
+
+
+def entry(article_id, prediction="UP"):
+    return ArticleSummarization(article_id=article_id, summary=f"summary {article_id}", prediction=prediction)
+
+
+@pytest.fixture
+def chains(monkeypatch):
+    monkeypatch.setattr(agents.content_cache, "bypass", True)
+    single = FakeChain(lambda inputs: Summarization(summary="single: " + inputs["article_content"], prediction="DOWN"))
+    registry = {"summarization": single}
+    monkeypatch.setattr(agents.chain_registry, "get", lambda name: registry[name])
+
+    def install(respond):
+        registry["batch_summarization"] = FakeChain(respond)
+        return registry["batch_summarization"], single
+
+    return install
+
+
+def test_missing_and_bogus_batch_entries_fall_back_to_single_calls(chains):
+    # Article 2 is skipped, article 1 is answered twice and article 7 doesn't exist.
+    batch, single = chains(lambda inputs: BatchSummarization(summaries=[entry(1), entry(3), entry(1, "DOWN"), entry(7)]))
+    results = asyncio.run(agents.summarize_batch(ARTICLES[:3], "Infosys"))
+
+    assert [r.summary for r in results] == ["summary 1", "single: " + ARTICLES[1], "summary 3"]
+    assert results[0].prediction == "UP"
+    assert len(batch.calls) == 1 and batch.calls[0]["article_count"] == 3
+    assert [call["article_content"] for call in single.calls] == [ARTICLES[1]]
+
+
+def test_unparseable_batches_are_retried_one_article_at_a_time(chains):
+    def broken(inputs):
+        raise ValueError("output did not match the schema")
+
+    _, single = chains(broken)
+    results = asyncio.run(agents.summarize_batch(ARTICLES[:2], "Infosys"))
+    assert [r.summary for r in results] == ["single: " + text for text in ARTICLES[:2]]
+    assert len(single.calls) == 2
+
+
+def test_throttled_batches_are_not_split_into_more_requests(chains):
+    def throttled(inputs):
+        raise HTTPException(status_code=429, detail="All models are busy")
+
+    _, single = chains(throttled)
+    assert asyncio.run(agents.summarize_batch(ARTICLES[:3], "Infosys")) == [None, None, None]
+    assert single.calls == []
+
+
+def test_batches_respect_the_size_limit(chains, monkeypatch):
+    monkeypatch.setattr(agents, "SUMMARY_BATCH_SIZE", 2)
+    batch, single = chains(lambda inputs: BatchSummarization(summaries=[entry(i) for i in range(1, inputs["article_count"] + 1)]))
+    results = asyncio.run(agents.summarize_batch(ARTICLES, "Infosys"))
+    assert all(result is not None for result in results)
+    assert [call["article_count"] for call in batch.calls] == [2, 2]
+    # A chunk of one goes through the single-article prompt.
+    assert [call["article_content"] for call in single.calls] == [ARTICLES[4]]
+
+
+def news_articles(count):
+    return [
+        SimpleNamespace(title=f"Story {i}", source="news.example", time_uploaded="1 hour ago", link=f"https://news.example/{i}")
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Stub fetches (with a per-article delay) and record how articles are grouped into batches."""
+    batches = []
+    delays = {}
+
+    async def fetch(article, stock_name, compactor):
+        delay = delays.get(str(article.link), 0)
+        if delay is None:
+            raise RuntimeError("page unavailable")
+        await asyncio.sleep(delay)
+        return f"text of {article.title}"
+
+    async def summarize(texts, stock_name):
+        batches.append([text.rsplit(" ", 1)[-1] for text in texts])
+        return [None if text.endswith("3") else Summarization(summary=text, prediction="UP") for text in texts]
+
+    monkeypatch.setattr(helper, "fetch_article_text", fetch)
+    monkeypatch.setattr(helper, "summarize_batch", summarize)
+    monkeypatch.setattr(helper, "SUMMARY_BATCH_LINGER", 0.05)
+    return batches, delays
+
+
+def run_pipeline(articles, deadline=5.0):
+    async def collect():
+        return dict([item async for item in helper.iter_processed_articles(articles, "Infosys", batch=True, deadline=deadline)])
+
+    return asyncio.run(collect())
+
+
+def test_full_batches_flush_without_waiting(pipeline, monkeypatch):
+    batches, _ = pipeline
+    monkeypatch.setattr(helper, "SUMMARY_BATCH_SIZE", 2)
+    results = run_pipeline(news_articles(5))
+    # Fetches finish together, in no particular order; no batch may exceed the size limit.
+    assert sorted(map(len, batches)) == [1, 2, 2]
+    assert sorted(i for batch in batches for i in batch) == ["0", "1", "2", "3", "4"]
+    assert results[0].summary == "text of Story 0"
+    # A missing summary keeps the article's metadata with an empty summary.
+    assert results[3].summary == "" and results[3].title == "Story 3"
+
+
+def test_a_slow_page_doesnt_hold_back_the_rest(pipeline):
+    batches, delays = pipeline
+    delays["https://news.example/2"] = 0.3
+    run_pipeline(news_articles(3))
+    assert [sorted(batch) for batch in batches] == [["0", "1"], ["2"]]
+
+
+def test_batches_flush_when_the_token_budget_is_reached(pipeline, monkeypatch):
+    batches, _ = pipeline
+    monkeypatch.setattr(helper, "SUMMARY_BATCH_TOKENS", 1)
+    run_pipeline(news_articles(3))
+    assert sorted(batches) == [["0"], ["1"], ["2"]]
+
+
+def test_failed_fetches_and_deadlines_fall_back_to_metadata(pipeline):
+    batches, delays = pipeline
+    delays["https://news.example/0"] = None
+    delays["https://news.example/1"] = 10
+    results = run_pipeline(news_articles(3), deadline=0.3)
+    assert set(results) == {0, 1, 2}
+    assert results[0].summary == "" and results[1].summary == ""
+    assert results[2].summary == "text of Story 2"
+    assert batches == [["2"]]
+
+
+def test_a_failed_batch_keeps_every_article(pipeline, monkeypatch):
+    async def throttled(texts, stock_name):
+        raise HTTPException(status_code=429, detail="All models are busy")
+
+    monkeypatch.setattr(helper, "summarize_batch", throttled)
+    results = run_pipeline(news_articles(2))
+    assert [results[i].summary for i in range(2)] == ["", ""]
@@ -0,0 +1,43 @@
+from datetime import date
+
+from services.coalescing import request_key
+
+TODAY = date(2026, 10, 14)
+
+
+class FixedRouter:
+    def __init__(self, route):
+        self.route = route
+
+    def classify(self, query):
+        return self.route, 1.0, "rules"
+
+
+def key(query, route):
+    return request_key(query, router=FixedRouter(route), today=TODAY)
+
+
+def test_budget_queries_dont_share_plain_suggestions():
+    budget = key("I have 50000 to invest", "2")
+    plain = key("suggest stocks under 50000", "2")
+    assert budget != plain
+    assert budget == key("I have ₹50,000 to invest", "2")
+
+
+def test_news_queries_match_on_their_text():
+    assert key("HDFC bank dividend news", "0") != key("HDFC bank news", "0")
+    assert key("HDFC bank news", "0") == key("  hdfc   bank news?", "0")
+
+
+def test_predictions_collapse_to_ticker_and_date():
+    assert key("Will TCS rise tomorrow", "1") == key("tcs prediction for tomorrow", "1")
+    assert key("Will TCS rise tomorrow", "1") != key("Will Infosys rise tomorrow", "1")
+
+
+def test_comparisons_ignore_ticker_order():
+    assert key("compare TCS and Infosys for next week", "3") == key("Infosys vs TCS next week", "3")
+
+
+def test_unrouted_queries_match_on_text_for_the_day():
+    assert key("What is a stock split?", None) == ("text", "what is a stock split", TODAY.isoformat())
+
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from services.compaction import ContentCompactor
+
+WIRE_STORY = "\n".join(
+    f"Infosys shares rose {i} percent on Tuesday after the company raised its revenue guidance for the year."
+    for i in range(1, 7)
+)
+
+
+def article(n: int) -> str:
+    own = "\n".join(f"Analysts at broker number {n} expect margins to widen by {j} basis points next quarter." for j in range(3))
+    return f"{WIRE_STORY}\n{own}"
+
+
+def test_syndicated_sentences_are_kept_once():
+    compactor = ContentCompactor()
+    first = compactor.compact(article(1), "Infosys", "gpt-4o")
+    second = compactor.compact(article(2), "Infosys", "gpt-4o")
+    assert "revenue guidance" in first
+    assert "revenue guidance" not in second
+    assert "broker number 2" in second
+
+
+def test_concurrent_compaction_shares_one_compactor():
+    compactor = ContentCompactor()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda n: compactor.compact(article(n), "Infosys", "gpt-4o"), range(64)))
+    assert all(f"broker number {n}" in text for n, text in enumerate(results))
+    # Every call kept something, and the shared set holds each distinct sentence once.
+    assert len(compactor._seen) == 6 + 64 * 3
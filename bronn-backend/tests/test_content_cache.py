@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+from services.content_cache import PAGE_TEXT_VERSION, ContentCache, normalize_url
+
+
+def test_normalize_url_drops_tracking_parameters_only():
+    url = "HTTPS://News.Example/markets/story/?utm_source=x&ref=home&id=7&ref_src=twsrc&fbclid=abc"
+    assert normalize_url(url) == "https://news.example/markets/story?id=7"
+    # Parameters that only start with "ref" identify the page.
+    assert normalize_url("https://news.example/live?refresh=1&reference=q2") == "https://news.example/live?reference=q2&refresh=1"
+
+
+def test_async_access_runs_off_the_event_loop(tmp_path):
+    cache = ContentCache(path=str(tmp_path / "content.sqlite3"))
+    loop_thread = threading.get_ident()
+    threads = []
+    get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.get_ident())
+        return get(key)
+
+    cache.get = recording_get
+
+    async def main():
+        assert await cache.aget("page:a") is None
+        await cache.aset("page:a", {"text": "hello"}, ttl=60)
+        return await cache.aget("page:a")
+
+    assert asyncio.run(main()) == {"text": "hello"}
+    assert threads and loop_thread not in threads
+    assert cache.stats()["hits"] == 1
+
+
+def test_bypass_skips_the_database(tmp_path):
+    cache = ContentCache(path=str(tmp_path / "content.sqlite3"), bypass=True)
+
+    async def main():
+        await cache.aset("page:a", "hello", ttl=60)
+        return await cache.aget("page:a")
+
+    assert asyncio.run(main()) is None
+    assert cache._conn is None
+
+
+def test_page_text_key_is_versioned(tmp_path):
+    cache = ContentCache(path=str(tmp_path / "content.sqlite3"))
+    key = cache.page_text_key("https://news.example/story/?utm_source=x", ["h1", "p"])
+    assert key == f"page:{PAGE_TEXT_VERSION}:https://news.example/story:h1,p"
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import pytest
+
+from services.entity_extractor import extract_amount, extract_stock_time, is_budget_query, parse_date
+
+
+@pytest.mark.parametrize("query, budget", [
+    ("I have 50000 to invest", True),
+    ("how should I split 1 lakh across stocks", True),
+    ("build a portfolio with 20k", True),
+    ("stocks under ₹5000", False),
+    ("suggest stocks below 500 rupees", False),
+    ("stocks around 1500", False),
+    ("best stocks to invest in 2024", False),
+])
+def test_budget_queries_are_told_apart_from_price_filters(query, budget):
+    assert is_budget_query(query) is budget
+
+
+@pytest.mark.parametrize("query, amount", [
+    ("I have 50000 to invest", 50000),
+    ("suggest stocks under ₹5,000", 5000),
+    ("stocks below 500 rupees", 500),
+    ("Rs. 750 shares", 750),
+    ("build a portfolio with 20k", 20000),
+    ("how should I split 1.5 lakh", 150000),
+    ("top 10 stocks under 500", 500),
+    ("best stocks to invest in 2024", None),
+    ("top 10 stocks to buy", None),
+    ("HDFC bank Q2 results news", None),
+    ("what did reliance announce on 3 march 2025", None),
+])
+def test_only_numbers_with_a_money_cue_are_amounts(query, amount):
+    assert extract_amount(query) == amount
+
+
+# A Wednesday, so "next Sunday" (4 days) and the 7-day default can't be confused.
+TODAY = date(2026, 10, 14)
+
+
+@pytest.mark.parametrize("query", [
+    "Sun Pharma forecast",
+    "predict sun pharma stock",
+    "what will sunpharma be worth",
+    "sun pharmaceutical outlook",
+])
+def test_company_names_are_not_read_as_weekdays(query):
+    assert parse_date(query, TODAY) is None
+    assert extract_stock_time(query, TODAY) == ("SUNPHARMA.NS", TODAY + timedelta(days=7))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Sun Pharma price on sunday", date(2026, 10, 18)),
+    ("sun pharma price next sun", date(2026, 10, 25)),
+    ("sun pharma this fri", date(2026, 10, 16)),
+    ("infosys on friday", date(2026, 10, 16)),
+    ("infosys next friday", date(2026, 10, 23)),
+])
+def test_weekdays_still_resolve(query, expected):
+    assert parse_date(query, TODAY) == expected
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from services.forecast_cache import ForecastCache
+
+
+def test_coalesced_callers_survive_the_leader_being_cancelled():
+    cache = ForecastCache(ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "forecast"
+
+    async def main():
+        leader = asyncio.create_task(cache.aget_or_compute("INFY.NS", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_or_compute("INFY.NS", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "forecast"
+    assert calls == [1]
+    assert cache.stats()["coalesced"] == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_work_is_cancelled_once_nobody_waits():
+    cache = ForecastCache(ttl=60)
+
+    async def main():
+        started, stopped = asyncio.Event(), asyncio.Event()
+
+        async def compute():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.set()
+
+        callers = [asyncio.create_task(cache.aget_or_compute("TCS.NS", compute)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(stopped.wait(), timeout=1)
+        await asyncio.sleep(0)
+        # The next caller starts afresh rather than awaiting the cancelled run.
+        return await cache.aget_or_compute("TCS.NS", lambda: asyncio.sleep(0, result="fresh"))
+
+    assert asyncio.run(main()) == "fresh"
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    cache = ForecastCache(ttl=60)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model failed")
+
+    async def main():
+        return await asyncio.gather(*[cache.aget_or_compute("LT.NS", compute) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+from datetime import date
+
+import numpy as np
+import pytest
+
+from services import stock_prediction
+from services.forecast_table import ForecastTable
+from services.model_registry import model_registry
+from services.price_store import price_store
+
+HORIZON = date(2024, 7, 30)
+HORIZON_DAYS = 30
+ROWS = 40
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    ds = np.arange(np.datetime64("2024-06-21"), np.datetime64("2024-06-21") + ROWS)
+    np.savez(
+        tmp_path / "TEST.NS_forecast.npz",
+        ds=ds,
+        yhat1=np.linspace(100.0, 139.0, ROWS),
+        trend=np.linspace(99.0, 118.5, ROWS),
+    )
+    manifest = {"TEST.NS": {
+        "model_fingerprint": "model-1",
+        "data_fingerprint": "data-1",
+        "horizon": HORIZON.isoformat(),
+        "horizon_days": HORIZON_DAYS,
+        "built_at": "1",
+    }}
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    monkeypatch.setattr(model_registry, "fingerprint", lambda ticker: "model-1")
+    monkeypatch.setattr(price_store, "ticker_fingerprint", lambda ticker: "data-1")
+    monkeypatch.setattr(price_store, "fingerprint", lambda: "prices-1")
+    table = ForecastTable(str(tmp_path))
+    monkeypatch.setattr(stock_prediction, "forecast_table", table)
+    return table
+
+
+def test_lookup_slices_the_table_to_the_target_date(table):
+    full, reduced = table.lookup("TEST.NS", date(2024, 7, 10))
+    # 10 prediction days before a 30-day horizon: the last 20 rows are dropped.
+    assert len(full["prediction"]["x"]) == ROWS - 20
+    assert full["prediction"]["x"][-1] == "2024-07-10"
+    assert reduced["summary"]["prediction_days"] == 10
+    assert reduced["summary"]["end_value"] == 119.0
+
+    longer, _ = table.lookup("TEST.NS", HORIZON)
+    assert longer["prediction"]["x"][:ROWS - 20] == full["prediction"]["x"]
+    assert len(longer["prediction"]["x"]) == ROWS
+
+
+def test_lookup_misses_past_the_horizon(table):
+    assert table.lookup("TEST.NS", date(2024, 8, 1)) is None
+    assert table.lookup("OTHER.NS", date(2024, 7, 10)) is None
+
+
+def test_table_hit_skips_the_pool_and_runs_off_the_event_loop(table, monkeypatch):
+    threads = []
+    lookup = table.lookup
+
+    def recording_lookup(ticker, target_date):
+        threads.append(threading.get_ident())
+        return lookup(ticker, target_date)
+
+    async def no_pool(ticker, target_date):
+        raise AssertionError("the table should have answered")
+
+    monkeypatch.setattr(table, "lookup", recording_lookup)
+    monkeypatch.setattr(stock_prediction.prediction_pool, "run", no_pool)
+    _, reduced = asyncio.run(stock_prediction.make_prediction_async("TEST.NS", date(2024, 7, 10)))
+    assert reduced["summary"]["end_date"] == "2024-07-10"
+    assert threads and threading.get_ident() not in threads
+
+
+def test_stale_fingerprint_falls_back_to_the_pool(table, monkeypatch):
+    calls = []
+
+    async def pool_run(ticker, target_date):
+        calls.append((ticker, target_date))
+        return {"from": "pool"}, {}
+
+    async def pool_run_batch(ticker, target_dates):
+        calls.extend((ticker, target_date) for target_date in target_dates)
+        return [({"from": "pool"}, {}) for _ in target_dates]
+
+    monkeypatch.setattr(price_store, "ticker_fingerprint", lambda ticker: "data-2")
+    monkeypatch.setattr(stock_prediction.prediction_pool, "run", pool_run)
+    monkeypatch.setattr(stock_prediction.prediction_pool, "run_batch", pool_run_batch)
+    stock_prediction.forecast_cache.clear()
+
+    assert table.lookup("TEST.NS", date(2024, 7, 10)) is None
+    full, _ = asyncio.run(stock_prediction.make_prediction_async("TEST.NS", date(2024, 7, 10)))
+    assert full == {"from": "pool"}
+    stock_prediction.forecast_cache.clear()
+    results = asyncio.run(stock_prediction.make_predictions_async([("TEST.NS", date(2024, 7, 11)), ("TEST.NS", date(2024, 7, 12))]))
+    assert [full for full, _ in results] == [{"from": "pool"}, {"from": "pool"}]
+    assert calls == [("TEST.NS", date(2024, 7, 10)), ("TEST.NS", date(2024, 7, 11)), ("TEST.NS", date(2024, 7, 12))]
@@ -0,0 +1,112 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from services.http_client import AsyncFetcher, FetchError
+
+
+def run_with(handler, coroutine_factory, **options):
+    fetcher = AsyncFetcher(transport=httpx.MockTransport(handler), backoff=0.001, **options)
+
+    async def main():
+        try:
+            return await coroutine_factory(fetcher)
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(main())
+
+
+def test_retries_5xx_then_succeeds():
+    calls = Counter()
+
+    def handler(request):
+        calls[request.url.path] += 1
+        if calls[request.url.path] < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, text="<p>ok</p>")
+
+    text = run_with(handler, lambda fetcher: fetcher.fetch_text("https://news.example/article"), retries=2)
+    assert text == "<p>ok</p>"
+    assert calls["/article"] == 3
+
+
+def test_gives_up_after_the_last_retry():
+    calls = Counter()
+
+    def handler(request):
+        calls["all"] += 1
+        return httpx.Response(500)
+
+    with pytest.raises(FetchError):
+        run_with(handler, lambda fetcher: fetcher.fetch_text("https://news.example/down"), retries=2)
+    assert calls["all"] == 3
+
+
+def test_transport_errors_are_retried_but_client_errors_are_not():
+    calls = Counter()
+
+    def handler(request):
+        calls[request.url.path] += 1
+        if request.url.path == "/flaky" and calls["/flaky"] == 1:
+            raise httpx.ConnectError("connection reset", request=request)
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, text="fine")
+
+    assert run_with(handler, lambda fetcher: fetcher.fetch_text("https://news.example/flaky")) == "fine"
+    with pytest.raises(FetchError):
+        run_with(handler, lambda fetcher: fetcher.fetch_text("https://news.example/missing"))
+    assert calls == Counter({"/flaky": 2, "/missing": 1})
+
+
+def test_responses_are_truncated_at_the_size_cap():
+    def handler(request):
+        return httpx.Response(200, content=b"a" * 10_000, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    text = run_with(handler, lambda fetcher: fetcher.fetch_text("https://news.example/huge"), max_bytes=100)
+    assert text == "a" * 100
+
+
+def test_requests_are_limited_per_host():
+    inflight, peak = Counter(), Counter()
+
+    async def handler(request):
+        host = request.url.host
+        inflight[host] += 1
+        peak[host] = max(peak[host], inflight[host])
+        peak["total"] = max(peak["total"], sum(inflight[h] for h in ("a.example", "b.example")))
+        await asyncio.sleep(0.01)
+        inflight[host] -= 1
+        return httpx.Response(200, text=host)
+
+    async def fetch_all(fetcher):
+        urls = [f"https://{host}/{i}" for host in ("a.example", "b.example") for i in range(6)]
+        return await asyncio.gather(*[fetcher.fetch_text(url) for url in urls])
+
+    results = run_with(handler, fetch_all, per_host=2)
+    assert results.count("a.example") == 6
+    assert peak["a.example"] == 2 and peak["b.example"] == 2
+    # One busy host doesn't hold up another.
+    assert peak["total"] == 4
+
+
+def test_probe_uses_head_and_treats_errors_as_missing():
+    methods = []
+
+    def handler(request):
+        methods.append(request.method)
+        if request.url.path == "/logo.png":
+            return httpx.Response(200)
+        if request.url.path == "/down.png":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(404)
+
+    async def probes(fetcher):
+        return [await fetcher.probe(f"https://logo.example/{name}") for name in ("logo.png", "missing.png", "down.png")]
+
+    assert run_with(handler, probes) == [True, False, False]
+    assert set(methods) == {"HEAD"}
+    assert len(methods) == 3
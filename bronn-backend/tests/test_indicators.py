@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.indicators import IndicatorEngine
+from services.price_store import PriceStore
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+BARS = 260
+
+
+def price_rows(bars=BARS, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-01", periods=bars)
+    frames = []
+    for k, ticker in enumerate(TICKERS):
+        close = 100 * (k + 1) * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        high = close * (1 + rng.uniform(0, 0.02, bars))
+        low = close * (1 - rng.uniform(0, 0.02, bars))
+        frame = pd.DataFrame({
+            "Date": dates, "Open": close, "High": high, "Low": low, "Close": close,
+            "Adj Close": close, "Volume": rng.integers(1_000, 10_000, bars), "Ticker": ticker,
+        })
+        if ticker == "BBB.NS":
+            # A ticker with missing sessions advances only on its own bars.
+            frame = frame[~frame.index.isin([30, 31, 150])]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def write(rows, path):
+    rows.to_csv(path, index=False, date_format="%Y-%m-%d")
+    return PriceStore(str(path))
+
+
+def reference(bars: pd.DataFrame) -> dict:
+    """The same indicators the textbook way, over one ticker's full history with pandas."""
+    close, high, low = bars["Close"], bars["High"], bars["Low"]
+    ema = lambda series, span: series.ewm(span=span, adjust=False).mean()
+    wilder = lambda series, period: series.ewm(alpha=1 / period, adjust=False).mean()
+    delta = close.diff()
+    rsi = 100 - 100 / (1 + wilder(delta.clip(lower=0), 14) / wilder((-delta).clip(lower=0), 14))
+    previous = close.shift()
+    true_range = pd.concat([high - low, (high - previous).abs(), (low - previous).abs()], axis=1).max(axis=1)
+    macd = ema(close, 12) - ema(close, 26)
+    middle = close.rolling(20).mean()
+    width = 2 * close.rolling(20).std(ddof=0)
+    drawdown = close / close.cummax() - 1
+    values = {
+        "close": close,
+        "sma_20": close.rolling(20).mean(),
+        "sma_50": close.rolling(50).mean(),
+        "sma_200": close.rolling(200).mean(),
+        "ema_12": ema(close, 12),
+        "ema_50": ema(close, 50),
+        "macd": macd,
+        "macd_signal": ema(macd, 9),
+        "rsi": rsi,
+        "bollinger_middle": middle,
+        "bollinger_upper": middle + width,
+        "bollinger_lower": middle - width,
+        "atr": wilder(true_range, 14),
+        "drawdown_percent": drawdown * 100,
+    }
+    latest = {name: float(series.iloc[-1]) for name, series in values.items()}
+    latest["max_drawdown_percent"] = float(drawdown.min() * 100)
+    return latest
+
+
+def assert_matches_reference(engine, rows):
+    for ticker in TICKERS:
+        bars = rows[rows["Ticker"] == ticker].sort_values("Date").reset_index(drop=True)
+        latest = engine.latest(ticker)
+        assert latest["bars"] == len(bars)
+        for name, expected in reference(bars).items():
+            assert latest[name] == pytest.approx(expected, rel=1e-6, abs=1e-3), (ticker, name)
+
+
+def test_indicators_match_a_pandas_reference(tmp_path):
+    rows = price_rows()
+    engine = IndicatorEngine(write(rows, tmp_path / "prices.csv"))
+    assert_matches_reference(engine, rows)
+
+
+def test_appended_bars_match_a_full_recompute(tmp_path):
+    rows = price_rows()
+    cutoff = rows["Date"].sort_values().unique()[200]
+    store = write(rows[rows["Date"] < cutoff], tmp_path / "prices.csv")
+    engine = IndicatorEngine(store)
+    engine.refresh()
+    before = engine.latest("AAA.NS")["bars"]
+
+    write(rows, tmp_path / "prices.csv")
+    assert_matches_reference(engine, rows)
+    assert engine.latest("AAA.NS")["bars"] == BARS > before
+
+
+def test_short_histories_leave_long_windows_empty(tmp_path):
+    rows = price_rows(bars=30)
+    engine = IndicatorEngine(write(rows, tmp_path / "prices.csv"))
+    latest = engine.latest("AAA.NS")
+    assert latest["sma_20"] is not None and latest["rsi"] is not None
+    assert latest["sma_50"] is None and latest["sma_200"] is None
+    with pytest.raises(KeyError):
+        engine.latest("ZZZ.NS")
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from data_models import BronnResponse
+from services.intent_router import IntentRouter, load_samples
+
+# Labelled queries; a null route means the rules must leave the query to the model or the LLM.
+SAMPLES = load_samples(str(Path(__file__).parent / "fixtures" / "router_queries.jsonl"))
+
+
+class FixedModel:
+    def __init__(self, route, confidence):
+        self.route = route
+        self.confidence = confidence
+
+    def classify(self, query):
+        return self.route, self.confidence
+
+
+@pytest.mark.parametrize("query, route", SAMPLES)
+def test_rules_route_the_labelled_queries(query, route):
+    router = IntentRouter(model_path="")
+    decided, _, source = router.classify(query)
+    assert decided == route
+    assert source == ("rules" if route is not None else "llm")
+
+
+def test_weak_words_alone_dont_decide_a_route():
+    router = IntentRouter(model_path="")
+    for query in ("will it rain tomorrow", "stocks or bonds", "TCS or Infosys"):
+        assert router.classify(query)[0] is None
+
+
+def test_confidence_threshold_decides_between_rules_model_and_llm():
+    # "Infosys headlines" is one news keyword plus a company: rule confidence 0.75.
+    assert IntentRouter(model_path="", confidence=0.75).classify("Infosys headlines")[2] == "rules"
+    strict = IntentRouter(model_path="", confidence=0.8)
+    assert strict.classify("Infosys headlines")[2] == "llm"
+
+    strict.model = FixedModel("0", 0.9)
+    assert strict.classify("Infosys headlines") == ("0", 0.9, "model")
+    strict.model = FixedModel("0", 0.7)
+    assert strict.classify("Infosys headlines")[2] == "llm"
+    # Greetings always go to the LLM, whatever the model says.
+    strict.model = FixedModel("2", 1.0)
+    assert strict.classify("hello")[2] == "llm"
+
+
+def test_llm_decisions_are_logged_off_the_event_loop(tmp_path):
+    log_path = tmp_path / "routes.jsonl"
+    router = IntentRouter(model_path="", log_path=str(log_path))
+    threads = []
+    log_decision = router._log_decision
+
+    def recording_log(query, route):
+        threads.append(threading.get_ident())
+        log_decision(query, route)
+
+    router._log_decision = recording_log
+    calls = []
+
+    async def fallback(query):
+        calls.append(query)
+        return BronnResponse(response="Hello!" if query == "hi" else "0")
+
+    async def main():
+        await router.route("latest news on HDFC bank", fallback)
+        await router.route("anything new for me", fallback)
+        await router.route("hi", fallback)
+
+    asyncio.run(main())
+    assert calls == ["anything new for me", "hi"]
+    assert threads and threading.get_ident() not in threads
+    # Only routes are training labels; general answers are not logged.
+    assert [json.loads(line) for line in log_path.read_text().splitlines()] == [{"query": "anything new for me", "route": "0"}]
+    assert router.stats()["sources"] == {"rules": 1, "llm": 2}
@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from chains import ChainRegistry, ChainSpec
+from services.llm_limiter import AdaptiveConcurrency, LLMBusyError, LLMLimiter
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeLLMServer:
+    """Stands in for the provider APIs: each model answers or fails per its script, the last step repeating."""
+
+    def __init__(self, script):
+        self.script = script
+        self.calls = {}
+
+    def respond(self, provider, model, prompt_value):
+        self.calls[model] = self.calls.get(model, 0) + 1
+        steps = self.script.get(model, ["ok"])
+        step = steps[min(self.calls[model], len(steps)) - 1]
+        if step == "ok":
+            return Answer(text=f"{model}: {prompt_value.to_string()}")
+        if step == "garbled":
+            raise ValueError("output doesn't match the schema")
+        request = httpx.Request("POST", f"https://api.{provider}.test/v1/chat/completions")
+        response = httpx.Response(int(step), headers={"retry-after": "30"}, request=request)
+        raise httpx.HTTPStatusError(f"{step} from {model}", request=request, response=response)
+
+    def llm_factory(self, provider, model):
+        server = self
+
+        class FakeChatModel:
+            def with_structured_output(self, schema):
+                async def call(prompt_value):
+                    await asyncio.sleep(0.001)
+                    return server.respond(provider, model, prompt_value)
+                return RunnableLambda(call)
+
+        return FakeChatModel()
+
+
+def registry(server):
+    specs = {"answer": ChainSpec("groq", "mixtral", Answer, ChatPromptTemplate.from_template("{question}"), (("groq", "llama"),))}
+    chain_registry = ChainRegistry(specs, limiter=LLMLimiter())
+    chain_registry.set_llm_factory(server.llm_factory)
+    return chain_registry
+
+
+def test_throttled_model_is_paused_and_calls_fail_over():
+    server = FakeLLMServer({"mixtral": ["429", "ok"]})
+    chain_registry = registry(server)
+    initial_limit = AdaptiveConcurrency().limit
+
+    async def main():
+        chain = chain_registry.get("answer")
+        first = await chain.ainvoke({"question": "hi"})
+        # Retry-After is 30s, so the next call skips the paused model instead of queueing for it.
+        second = await chain.ainvoke({"question": "again"})
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.text.startswith("llama:") and second.text.startswith("llama:")
+    assert server.calls == {"mixtral": 1, "llama": 2}
+
+    primary = chain_registry.limiter.model("groq", "mixtral")
+    assert primary.rate_limited == 1
+    assert primary.rejected == 1
+    assert primary.bucket.wait_time() > 25
+    assert primary.concurrency.limit == pytest.approx(max(1.0, initial_limit / 2))
+    assert chain_registry.limiter.failovers == 2
+
+
+@pytest.mark.parametrize("script, status_code", [
+    ({"mixtral": ["429"], "llama": ["429"]}, 429),
+    ({"mixtral": ["500"], "llama": ["503"]}, 503),
+])
+def test_exhausting_every_model_raises_http_errors(script, status_code):
+    chain_registry = registry(FakeLLMServer(script))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(chain_registry.get("answer").ainvoke({"question": "hi"}))
+    assert error.value.status_code == status_code
+
+
+def test_bad_output_is_not_retried_on_another_model():
+    server = FakeLLMServer({"mixtral": ["garbled"]})
+    with pytest.raises(ValueError):
+        asyncio.run(registry(server).get("answer").ainvoke({"question": "hi"}))
+    assert server.calls == {"mixtral": 1}
+
+
+def test_concurrency_limit_grows_on_fast_responses_and_backs_off():
+    limit = AdaptiveConcurrency(initial=4, maximum=8, tolerance=2.0)
+    for _ in range(50):
+        limit.record_success(0.1)
+    assert limit.limit == 8
+
+    limit.record_throttle()
+    assert limit.limit == 4
+
+    # Ten times slower than the best latency seen: trimmed multiplicatively.
+    for _ in range(5):
+        limit.record_success(1.0)
+    assert limit.limit < 4
+
+    for _ in range(10):
+        limit.record_throttle()
+    assert limit.limit == 1
+
+
+def test_successful_calls_raise_the_limit():
+    chain_registry = registry(FakeLLMServer({}))
+    initial_limit = AdaptiveConcurrency().limit
+
+    async def main():
+        chain = chain_registry.get("answer")
+        await asyncio.gather(*[chain.ainvoke({"question": str(i)}) for i in range(10)])
+
+    asyncio.run(main())
+    assert chain_registry.limiter.model("groq", "mixtral").concurrency.limit > initial_limit
+
+
+def test_requests_rejected_at_the_queue_keep_their_rate_budget():
+    model = LLMLimiter().model("groq", "mixtral")
+    model.concurrency.limit = 1
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "done"
+
+        holder = asyncio.create_task(model.run(slow, time.monotonic() + 5))
+        await asyncio.sleep(0.01)
+        tokens = (model.bucket.tokens, model.provider_bucket.tokens)
+        for _ in range(4):
+            with pytest.raises(LLMBusyError):
+                await model.run(slow, time.monotonic() + 0.01)
+        assert model.bucket.tokens >= tokens[0] and model.provider_bucket.tokens >= tokens[1]
+
+        # An empty provider bucket hands back the model token it no longer needs.
+        release.set()
+        assert await holder == "done"
+        model.provider_bucket.pause(30)
+        model_tokens = model.bucket.tokens
+        with pytest.raises(LLMBusyError):
+            await model.run(slow, time.monotonic() + 1)
+        assert model.bucket.tokens >= model_tokens
+        assert model.concurrency.inflight == 0
+
+    asyncio.run(main())
+    assert model.rejected == 5
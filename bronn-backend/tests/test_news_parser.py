@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from services.news_parser import NEWS_RESULTS_LIMIT, build_news_response, parse_news_results
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def test_js_layout_extracts_link_source_and_time():
+    articles = parse_news_results(load("google_news_js.html"), "infosys stock news", limit=10)
+
+    assert [article.source for article in articles] == [
+        "livemint.com", "economictimes.indiatimes.com", "business-standard.com", "moneycontrol.com",
+    ]
+    first = articles[0]
+    assert first.title == "Infosys shares rise after Q2 results beat estimates"
+    assert str(first.link) == "https://www.livemint.com/market/stock-market-news/infosys-shares-rise-after-q2-results-beat-estimates-11697012345678.html"
+    assert first.time_uploaded == "2 hours ago"
+    assert articles[2].time_uploaded == "Oct 15, 2024"
+
+
+def test_basic_layout_unwraps_redirects_and_finds_time_outside_the_link():
+    articles = parse_news_results(load("google_news_basic.html"), "hdfc bank stock news", limit=10)
+
+    assert [str(article.link) for article in articles] == [
+        "https://www.thehindubusinessline.com/markets/hdfc-bank-q2-net-profit-rises-5-per-cent/article68765432.ece",
+        "https://www.ndtvprofit.com/markets/hdfc-bank-shares-slip-as-deposit-growth-lags-6543210",
+        "https://www.cnbctv18.com/market/hdfc-bank-target-price-raised-by-jefferies-19876543.htm",
+    ]
+    assert articles[0].title == "HDFC Bank Q2 net profit rises 5% on steady loan growth"
+    assert articles[0].source == "thehindubusinessline.com"
+    assert [article.time_uploaded for article in articles] == ["3 hours ago", "1 day ago", "Oct 19, 2024"]
+
+
+@pytest.mark.parametrize("fixture, query", [
+    ("google_news_js.html", "infosys stock news"),
+    ("google_news_basic.html", "hdfc bank stock news"),
+])
+def test_results_are_capped_at_the_limit(fixture, query):
+    articles = parse_news_results(load(fixture), query)
+    assert len(articles) == NEWS_RESULTS_LIMIT
+    assert len(parse_news_results(load(fixture), query, limit=1)) == 1
+
+
+def test_results_about_other_stocks_are_dropped():
+    titles = [article.title for article in parse_news_results(load("google_news_basic.html"), "hdfc bank stock news", limit=10)]
+    assert "Sensex, Nifty end flat ahead of Fed decision" not in titles
+
+
+@pytest.mark.parametrize("html, query", [
+    # A results page that isn't about the stock asked for.
+    (load("google_news_js.html"), "hdfc bank stock news"),
+    # An unrecognized page with no outbound article links.
+    ("<html><body><div>Our systems have detected unusual traffic.</div><a href='/search?q=x'>retry</a></body></html>", "infosys stock news"),
+    ("", "infosys stock news"),
+])
+def test_nothing_parsed_signals_llm_fallback(html, query):
+    # fetch_news hands the page to the LLM extractor whenever this comes back empty.
+    assert parse_news_results(html, query) == []
+
+
+def test_build_news_response():
+    articles = parse_news_results(load("google_news_js.html"), "infosys stock news")
+    response = build_news_response(articles, "infosys stock news")
+
+    assert response.news.articles == articles
+    assert response.news.intro == (
+        'Here are the 3 latest news articles for "infosys stock news", '
+        "from livemint.com, economictimes.indiatimes.com, business-standard.com."
+    )
+    assert response.news.conclusion
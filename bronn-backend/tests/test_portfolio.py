@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.portfolio import allocate, check_feasible, optimize_weights
+from services.price_index import SECTORS, PriceIndex
+
+
+def closes(tickers, drift, days=64, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(drift, 0.01, (days, len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), columns=tickers, index=pd.bdate_range("2024-01-02", periods=days))
+
+
+def sector_weights(allocation):
+    weights = {}
+    for holding in allocation.holdings:
+        weights[holding.sector] = weights.get(holding.sector, 0.0) + holding.weight
+    return weights
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_optimized_weights_respect_every_cap(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 26))
+    _, sector_ids = np.unique(rng.integers(0, rng.integers(1, 6), n), return_inverse=True)
+    mean = rng.normal(0.2, 0.3, n)
+    factors = rng.normal(0, 0.2, (n, n))
+    covariance = factors @ factors.T / n
+    upper = np.full(n, rng.uniform(0.1, 0.6))
+    sector_cap = rng.uniform(0.2, 0.7)
+
+    weights = optimize_weights(mean, covariance, upper, sector_ids, sector_cap)
+
+    total = min(1.0, np.minimum(np.bincount(sector_ids, weights=upper), sector_cap).sum())
+    check_feasible(weights, upper, total, sector_ids, sector_cap)
+
+
+def test_check_feasible_rejects_a_sector_breach():
+    weights = np.array([0.3, 0.233, 0.237, 0.23])
+    with pytest.raises(ValueError):
+        check_feasible(weights, np.full(4, 0.3), 1.0, np.array([0, 0, 1, 1]), 0.5)
+
+
+def test_allocation_keeps_a_favoured_sector_under_its_cap():
+    # Financials trend up and everything else down, so the optimizer wants all of its weight there.
+    tickers = list(SECTORS)
+    drift = np.array([0.004 if SECTORS[ticker] == "Financials" else -0.001 for ticker in tickers])
+    allocation = allocate(PriceIndex.from_closes(closes(tickers, drift)), 50_000, max_stock_weight=0.3, max_sector_weight=0.5)
+
+    assert allocation.holdings
+    assert max(sector_weights(allocation).values()) <= 50.0
+    assert max(holding.weight for holding in allocation.holdings) <= 30.0
+    assert allocation.invested + allocation.cash == pytest.approx(50_000)
+
+
+def test_unmapped_tickers_are_not_capped_as_one_sector():
+    tickers = [f"T{i}.NS" for i in range(200)]
+    allocation = allocate(PriceIndex.from_closes(closes(tickers, 0.001)), 50_000, max_stock_weight=0.3, max_sector_weight=0.5)
+
+    assert allocation.invested > 0.95 * 50_000
+    assert max(holding.weight for holding in allocation.holdings) <= 30.0
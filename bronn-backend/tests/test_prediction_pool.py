@@ -0,0 +1,36 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from services import prediction_pool as pool_module
+from services.prediction_pool import PredictionPool
+
+
+def test_timed_out_jobs_keep_occupying_the_queue_until_they_finish(monkeypatch):
+    def slow_predictions(ticker, target_dates):
+        time.sleep(0.3)
+        return True, [({"ticker": ticker}, {})]
+
+    monkeypatch.setattr(pool_module, "_run_predictions", slow_predictions)
+    pool = PredictionPool(workers=1, queue_depth=1, timeout=0.05)
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def main():
+        with pytest.raises(HTTPException) as timed_out:
+            await pool.run("INFY.NS", date(2026, 1, 1))
+        assert timed_out.value.status_code == 504
+        # The worker is still busy with the abandoned job, so the queue is still full.
+        with pytest.raises(HTTPException) as busy:
+            await pool.run("INFY.NS", date(2026, 1, 1))
+        assert busy.value.status_code == 429
+        await asyncio.sleep(0.4)
+        assert pool.stats()["pending"] == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        pool._executor.shutdown(wait=True)
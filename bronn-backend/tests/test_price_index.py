@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.price_index import PriceIndex
+
+
+def test_daily_change_and_return_come_from_the_closes():
+    closes = pd.DataFrame(
+        {"INFY.NS": np.linspace(1500, 1600, 30), "TCS.NS": np.linspace(4000, 3800, 30)},
+        index=pd.bdate_range("2024-01-02", periods=30),
+    )
+    index = PriceIndex.from_closes(closes)
+
+    infy, tcs = index.position("INFY.NS"), index.position("TCS.NS")
+    assert index.position("WIPRO.NS") is None
+    assert index.tickers[infy] == "INFY.NS"
+    assert index.price[infy] == pytest.approx(1600)
+    assert index.daily_change[infy] == pytest.approx(100 / 29)
+    assert index.daily_change[tcs] == pytest.approx(-200 / 29)
+    assert index.return_1mo[tcs] == pytest.approx((3800 / closes["TCS.NS"].iloc[-22] - 1) * 100)
+
+
+def test_single_day_of_history_has_no_daily_change():
+    index = PriceIndex.from_closes(pd.DataFrame({"INFY.NS": [1500.0]}, index=pd.bdate_range("2024-01-02", periods=1)))
+    assert np.isnan(index.daily_change[0])
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from services import price_snapshot
+from services.price_snapshot import IST, CsvSource, PriceSnapshot, market_is_open
+from services.price_store import PriceStore
+
+FIXTURE = str(Path(__file__).parent / "fixtures" / "prices.csv")
+TICKERS = ["TCS.NS", "INFY.NS", "ITC.NS"]
+
+
+@pytest.fixture(autouse=True)
+def no_metadata_cache(monkeypatch):
+    monkeypatch.setattr(price_snapshot.content_cache, "bypass", True)
+
+
+def fixture_source():
+    return CsvSource(PriceStore(FIXTURE))
+
+
+class ScriptedSource:
+    """Serves one frame of closes per refresh, then repeats the last."""
+
+    def __init__(self, *frames):
+        self.frames = list(frames)
+        self.calls = 0
+
+    def fetch_closes(self, tickers):
+        self.calls += 1
+        frame = self.frames[min(self.calls, len(self.frames)) - 1]
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+
+def closes(**prices):
+    dates = pd.bdate_range("2026-10-01", periods=3)
+    return pd.DataFrame({ticker: [price, price, price] for ticker, price in prices.items()}, index=dates)
+
+
+@pytest.mark.parametrize("now, is_open", [
+    (datetime(2026, 10, 14, 9, 14, tzinfo=IST), False),
+    (datetime(2026, 10, 14, 9, 15, tzinfo=IST), True),
+    (datetime(2026, 10, 14, 15, 30, tzinfo=IST), True),
+    (datetime(2026, 10, 14, 15, 31, tzinfo=IST), False),
+    # Saturday.
+    (datetime(2026, 10, 17, 11, 0, tzinfo=IST), False),
+    # 04:00 UTC is 09:30 in Mumbai.
+    (datetime(2026, 10, 14, 4, 0, tzinfo=timezone.utc), True),
+])
+def test_market_hours(now, is_open):
+    assert market_is_open(now) is is_open
+
+
+def test_loads_the_offline_fixture():
+    snapshot = PriceSnapshot(TICKERS + ["MISSING.NS"], source=fixture_source())
+    assert snapshot.age() is None
+    snapshot.refresh()
+
+    assert sorted(snapshot.index.tickers) == sorted(TICKERS)
+    # Sorted ascending by price, latest close of each fixture series.
+    assert snapshot.prices == [(487.5, "ITC.NS"), (1365.0, "INFY.NS"), (4348.0, "TCS.NS")]
+    assert snapshot.age() is not None and snapshot.stats()["source"] == "CsvSource"
+
+
+def test_refresh_swaps_the_whole_snapshot():
+    source = ScriptedSource(closes(**{"TCS.NS": 4000.0, "ITC.NS": 450.0}), closes(**{"TCS.NS": 4100.0}), closes())
+    snapshot = PriceSnapshot(TICKERS, source=source)
+    snapshot.refresh()
+    before = snapshot.index
+
+    snapshot.refresh()
+    # A reader holding the old index still sees a complete, consistent view.
+    assert list(before.tickers) == ["ITC.NS", "TCS.NS"] and list(before.price) == [450.0, 4000.0]
+    assert list(snapshot.index.tickers) == ["TCS.NS"] and snapshot.prices == [(4100.0, "TCS.NS")]
+
+    # An empty download keeps serving the last good snapshot.
+    snapshot.refresh()
+    assert snapshot.prices == [(4100.0, "TCS.NS")]
+
+
+def test_wait_ready_times_out_until_the_first_load():
+    snapshot = PriceSnapshot(TICKERS, source=fixture_source(), refresh_seconds=60)
+
+    async def main():
+        assert await snapshot.wait_ready(timeout=0.01) is False
+        snapshot.start()
+        try:
+            assert await snapshot.wait_ready(timeout=5) is True
+            return len(snapshot.index)
+        finally:
+            await snapshot.stop()
+
+    assert asyncio.run(main()) == 3
+
+
+def test_a_failed_first_load_still_unblocks_waiters():
+    snapshot = PriceSnapshot(TICKERS, source=ScriptedSource(RuntimeError("offline")), refresh_seconds=60)
+
+    async def main():
+        snapshot.start()
+        try:
+            return await snapshot.wait_ready(timeout=5)
+        finally:
+            await snapshot.stop()
+
+    assert asyncio.run(main()) is True
+    assert len(snapshot.index) == 0
+
+
+@pytest.mark.parametrize("is_open, refreshes", [(True, True), (False, False)])
+def test_refreshes_only_while_the_market_is_open(monkeypatch, is_open, refreshes):
+    monkeypatch.setattr(price_snapshot, "market_is_open", lambda now=None: is_open)
+    source = ScriptedSource(closes(**{"TCS.NS": 4000.0}))
+    snapshot = PriceSnapshot(TICKERS, source=source, refresh_seconds=0.02)
+
+    async def main():
+        snapshot.start()
+        await asyncio.sleep(0.2)
+        await snapshot.stop()
+
+    asyncio.run(main())
+    # The startup load always happens; later ones only during market hours.
+    assert (source.calls > 1) is refreshes
+    assert source.calls >= 1
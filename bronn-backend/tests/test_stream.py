@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("yfinance")
+# agents.py refuses to import without API keys; no request here reaches a provider.
+for name in ("GROQ_API_KEY", "OPENAI_API_KEY"):
+    os.environ[name] = os.getenv(name) or "test"
+
+import server  # noqa: E402
+from data_models import BronnResponse, PriceFinder  # noqa: E402
+
+
+def stream(query):
+    async def collect():
+        return [json.loads(line) async for line in server.bronn_event_stream(server.UserPrompt(query=query))]
+
+    return asyncio.run(collect())
+
+
+def route_to(monkeypatch, route):
+    async def fake_route(query, fallback):
+        return BronnResponse(response=route)
+
+    monkeypatch.setattr(server.intent_router, "route", fake_route)
+
+
+def returning(value):
+    async def fake(*args, **kwargs):
+        return value
+
+    return fake
+
+
+@pytest.fixture
+def suggestions(monkeypatch):
+    route_to(monkeypatch, "2")
+    monkeypatch.setattr(server, "extract_price", returning(PriceFinder(price=50000)))
+    monkeypatch.setattr(server.suggester, "suggest_stocks", lambda price, num_suggestions: [("TCS.NS", 4000.0)])
+    monkeypatch.setattr(server.suggester, "allocate", lambda budget: {"budget": budget, "holdings": []})
+    monkeypatch.setattr(server.suggester, "get_detailed_data", returning([{"ticker": "TCS.NS"}]))
+    monkeypatch.setattr(server, "generate_suggestion_report", returning({"introduction": "Picks"}))
+
+
+def test_suggestions_wait_for_prices_and_answer_503_on_a_cold_start(suggestions, monkeypatch):
+    monkeypatch.setattr(server.suggester.snapshot, "wait_ready", returning(False))
+    events = stream("suggest stocks under 50000")
+    assert [event["event"] for event in events] == ["route", "error"]
+    assert events[-1]["status_code"] == 503
+
+
+def test_budget_suggestions_stream_an_allocation(suggestions, monkeypatch):
+    monkeypatch.setattr(server.suggester.snapshot, "wait_ready", returning(True))
+    events = stream("I have 50000 to invest")
+    assert [event["event"] for event in events] == ["route", "suggested_stocks", "allocation", "report", "done"]
+    assert events[2]["data"]["budget"] == 50000
+    # Plain price searches get no allocation.
+    assert "allocation" not in [event["event"] for event in stream("suggest stocks under 50000")]
+
+
+def test_prediction_streams_the_forecast_before_the_report(monkeypatch):
+    route_to(monkeypatch, "1")
+    monkeypatch.setattr(server, "predict_stock", returning(({"prediction": {"x": [], "y": []}}, {}, "TCS")))
+    monkeypatch.setattr(server, "generate_stock_report", returning(SimpleNamespace(introduction="i", insights=["a"], conclusion="c")))
+    events = stream("will tcs rise next week")
+    assert [event["event"] for event in events] == ["route", "prediction", "report", "done"]
+    assert events[2]["data"] == {"introduction": "i", "insights": ["a"], "conclusion": "c"}
+
+
+def test_general_answers_and_failures_end_the_stream(monkeypatch):
+    route_to(monkeypatch, "Hello! Ask me about Indian stocks.")
+    assert [event["event"] for event in stream("hi")] == ["route", "general", "done"]
+
+    route_to(monkeypatch, "1")
+    monkeypatch.setattr(server, "predict_stock", returning(None))
+    events = stream("will tcs rise next week")
+    assert events[-1]["event"] == "error" and events[-1]["status_code"] == 500